@@ -0,0 +1,384 @@
+"""
+almacen.py
+==========
+Capa de almacenamiento entre etapas del pipeline.
+
+Cada capa (crudos -> intermedios -> procesados) se guarda como Parquet tipado:
+los enteros siguen siendo enteros, las fechas siguen siendo fechas y las columnas
+categóricas conservan su diccionario, así que la etapa siguiente no re-infiere
+tipos ni re-parsea texto. La lectura usa memory-map y proyección de columnas.
+
+El CSV queda como formato de exportación: por defecto cada capa se exporta también
+a CSV al lado del Parquet (mismo nombre, extensión .csv) para notebooks y consumo
+externo. Con LIBERTADORES_EXPORTAR_CSV=0 solo se escribe Parquet.
+
+Uso desde un script de src/<etapa>/:
+
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+    from almacen import leer_capa, escribir_capa
+
+    df = leer_capa(Path("datos/intermedios/partidos_rsssf.parquet"), columnas=["temporada", "fase"])
+    escribir_capa(df, Path("datos/procesados/partidos_rsssf1_validos.parquet"))
+
+Capas particionadas: una ruta sin extensión (ej: datos/procesados/partidos_rsssf1_enhanced)
+es un directorio con un Parquet por temporada (temporada=1996/parte.parquet, ...) y un
+manifiesto (_manifiesto.json) con filas y hash del contenido de cada partición.
+escribir_capa solo reescribe las particiones cuyo contenido cambió y escribir_particiones
+actualiza algunas temporadas sin tocar el resto; leer_capa(ruta, temporadas=[...]) lee solo
+esas particiones. El export CSV de una capa particionada también es por partición
+(temporada=1996/parte.csv) y se reescribe junto con su Parquet, así que actualizar una
+temporada no reexporta el resto; el CSV único <capa>.csv se arma concatenando los
+parte.csv (texto, sin re-serializar ninguna partición).
+
+Exportar una capa cualquiera a un CSV único a mano:
+
+    python src/almacen.py datos/procesados/partidos_rsssf1_enhanced
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+EXPORTAR_CSV = os.environ.get("LIBERTADORES_EXPORTAR_CSV", "1") != "0"
+
+COLUMNA_PARTICION = "temporada"
+MANIFIESTO = "_manifiesto.json"
+
+
+def ruta_csv(ruta: Path) -> Path:
+    return Path(ruta).with_suffix(".csv")
+
+
+def es_particionada(ruta: Path) -> bool:
+    return Path(ruta).suffix == ""
+
+
+def existe_capa(ruta: Path) -> bool:
+    ruta = Path(ruta)
+    return (ruta / MANIFIESTO).exists() if es_particionada(ruta) else ruta.exists()
+
+
+def leer_capa(ruta: Path, columnas: list[str] | None = None, temporadas: list | None = None) -> pd.DataFrame:
+    """
+    Lee una capa. Prefiere el Parquet; si no existe (capa generada antes de esta
+    versión, o un CSV editado a mano) cae al CSV hermano.
+    `temporadas` solo poda particiones en capas particionadas; en el resto se filtra al leer.
+    """
+    ruta = Path(ruta)
+    if es_particionada(ruta) and existe_capa(ruta):
+        return leer_particiones(ruta, columnas, temporadas)
+    if ruta.suffix == ".parquet" and ruta.exists():
+        df = pd.read_parquet(ruta, columns=columnas, memory_map=True)
+    else:
+        alternativa = ruta_csv(ruta)
+        if not alternativa.exists():
+            raise FileNotFoundError(f"No existe la capa {ruta} (ni {alternativa})")
+        df = pd.read_csv(alternativa, usecols=columnas)
+
+    if temporadas is not None:
+        df = df[df[COLUMNA_PARTICION].isin(temporadas)].reset_index(drop=True)
+    return df
+
+
+def escribir_capa(df: pd.DataFrame, ruta: Path, exportar_csv: bool | None = None) -> Path:
+    """
+    Escribe la capa como Parquet (atómico: tmp + replace) y, si corresponde, la exporta a CSV.
+    Devuelve la ruta del Parquet (o del directorio, si la capa es particionada; ahí el
+    export CSV es por partición más el CSV único armado con ellas).
+    """
+    if es_particionada(ruta):
+        ruta = Path(ruta)
+        escribir_particiones(df, ruta, completa=True, exportar_csv=exportar_csv)
+        return ruta
+
+    ruta = Path(ruta).with_suffix(".parquet")
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+
+    tmp = ruta.with_name(f"{ruta.name}.{os.getpid()}.tmp")
+    df.to_parquet(tmp, index=False)
+    tmp.replace(ruta)
+
+    if EXPORTAR_CSV if exportar_csv is None else exportar_csv:
+        exportar_a_csv(df, ruta_csv(ruta))
+    return ruta
+
+
+# ====== CAPAS PARTICIONADAS ======
+
+def leer_manifiesto(carpeta: Path) -> dict:
+    ruta = Path(carpeta) / MANIFIESTO
+    if not ruta.exists():
+        return {"columna": COLUMNA_PARTICION, "particiones": []}
+    return json.loads(ruta.read_text(encoding="utf-8"))
+
+
+def _guardar_manifiesto(carpeta: Path, manifiesto: dict) -> None:
+    ruta = Path(carpeta) / MANIFIESTO
+    tmp = ruta.with_name(f"{ruta.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(manifiesto, ensure_ascii=False, indent=2), encoding="utf-8")
+    tmp.replace(ruta)
+
+
+def _hash_particion(df: pd.DataFrame) -> str:
+    h = hashlib.sha256(str(list(zip(df.columns, map(str, df.dtypes)))).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()[:16]
+
+
+def _valor_json(valor):
+    return valor.item() if hasattr(valor, "item") else valor
+
+
+def _escribir_atomico(destino: Path, escribir) -> None:
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    tmp = destino.with_name(f"{destino.name}.{os.getpid()}.tmp")
+    escribir(tmp)
+    tmp.replace(destino)
+
+
+def _esquema_capa(esquema: pa.Schema, otro: pa.Schema | None = None) -> pa.Schema:
+    """
+    Esquema común de las particiones de una capa: los diccionarios con índice int32 (el
+    ancho de código de un categórico depende de cuántas categorías tenga cada partición)
+    y, si se da `otro`, las columnas de tipo null (todo nulo) con el tipo que traiga `otro`.
+    Conserva la metadata de pandas (Int32, category, ...) del esquema original.
+    """
+    campos = []
+    for f in esquema:
+        if otro is not None and pa.types.is_null(f.type) and f.name in otro.names:
+            f = f.with_type(otro.field(f.name).type)
+        if pa.types.is_dictionary(f.type):
+            f = f.with_type(pa.dictionary(pa.int32(), f.type.value_type, f.type.ordered))
+        campos.append(f)
+    return pa.schema(campos, metadata=esquema.metadata)
+
+
+def _a_esquema(tabla: pa.Table, esquema: pa.Schema, origen: str) -> pa.Table:
+    if set(tabla.column_names) != set(esquema.names):
+        raise ValueError(f"{origen}: columnas {sorted(tabla.column_names)} != las de la capa {sorted(esquema.names)}")
+    return tabla.select(esquema.names).cast(_esquema_capa(esquema, tabla.schema))
+
+
+def escribir_particiones(df: pd.DataFrame, carpeta: Path, completa: bool = False,
+                         columna: str = COLUMNA_PARTICION, exportar_csv: bool | None = None) -> int:
+    """
+    Escribe una partición por valor de `columna` presente en df (orden de filas conservado)
+    y actualiza el manifiesto. Una partición cuyo contenido no cambió (mismo hash) no se
+    reescribe. Con completa=True, df es la capa entera y se borran las particiones que ya
+    no aparecen; si no, las demás particiones quedan como estaban y cada partición nueva
+    se castea al esquema de las guardadas (categóricos, Int32, ...), para que la capa
+    siga teniendo un solo esquema.
+    Con export CSV activo, cada partición escrita lleva su parte.csv al lado y, si algo
+    cambió, se rearma el CSV único de la capa (<carpeta>.csv).
+    Devuelve cuántas particiones se escribieron.
+    """
+    exportar_csv = EXPORTAR_CSV if exportar_csv is None else exportar_csv
+    carpeta = Path(carpeta)
+    carpeta.mkdir(parents=True, exist_ok=True)
+    manifiesto = leer_manifiesto(carpeta)
+    if manifiesto["columna"] != columna:
+        raise ValueError(f"{carpeta} está particionada por {manifiesto['columna']}, no por {columna}")
+    previas = {p["valor"]: p for p in manifiesto["particiones"]}
+    nuevas = {} if completa else dict(previas)
+
+    esquema = None
+    if not completa:
+        # el de una partición guardada que esta escritura no reemplaza
+        reemplazadas = {_valor_json(v) for v in df[columna].unique()}
+        for p in manifiesto["particiones"]:
+            if p["valor"] not in reemplazadas and (carpeta / p["archivo"]).exists():
+                esquema = pq.read_schema(carpeta / p["archivo"])
+                break
+    if esquema is None:
+        esquema = pa.Schema.from_pandas(df, preserve_index=False)
+
+    escritas = 0
+    for valor, parte in df.groupby(columna, sort=True, observed=True):
+        valor = _valor_json(valor)
+        archivo = f"{columna}={valor}/parte.parquet"
+        tabla = _a_esquema(pa.Table.from_pandas(parte, preserve_index=False), esquema, f"{carpeta} {archivo}")
+        # hash y CSV sobre lo que queda guardado, no sobre los tipos con que llegó df
+        parte = tabla.to_pandas()
+        huella = _hash_particion(parte)
+        previa = previas.get(valor)
+        destino = carpeta / archivo
+        cambio = previa is None or previa["hash"] != huella or not destino.exists()
+        if cambio:
+            _escribir_atomico(destino, lambda tmp: pq.write_table(tabla, tmp))
+            escritas += 1
+        if exportar_csv and (cambio or not ruta_csv(destino).exists()):
+            _escribir_atomico(ruta_csv(destino), lambda tmp: parte.to_csv(tmp, index=False, encoding="utf-8"))
+        nuevas[valor] = {"valor": valor, "archivo": archivo, "filas": len(parte), "hash": huella}
+
+    manifiesto["particiones"] = [nuevas[v] for v in sorted(nuevas)]
+    _guardar_manifiesto(carpeta, manifiesto)
+
+    borradas = set(previas) - set(nuevas)
+    for valor in borradas:
+        (carpeta / previas[valor]["archivo"]).unlink(missing_ok=True)
+        ruta_csv(carpeta / previas[valor]["archivo"]).unlink(missing_ok=True)
+
+    if exportar_csv and (escritas or borradas or not ruta_csv(carpeta).exists()):
+        _exportar_csv_unico(carpeta, manifiesto, list(df.columns))
+    return escritas
+
+
+def _exportar_csv_unico(carpeta: Path, manifiesto: dict, columnas: list[str]) -> Path:
+    """<carpeta>.csv: los parte.csv en orden de partición, con el encabezado una sola vez."""
+    def escribir(tmp: Path) -> None:
+        if not manifiesto["particiones"]:
+            pd.DataFrame(columns=columnas).to_csv(tmp, index=False, encoding="utf-8")
+            return
+        with open(tmp, "wb") as salida:
+            for i, p in enumerate(manifiesto["particiones"]):
+                with open(ruta_csv(carpeta / p["archivo"]), "rb") as parte:
+                    if i:
+                        parte.readline()
+                    shutil.copyfileobj(parte, salida)
+
+    destino = ruta_csv(carpeta)
+    _escribir_atomico(destino, escribir)
+    return destino
+
+
+def leer_particiones(carpeta: Path, columnas: list[str] | None = None, valores: list | None = None) -> pd.DataFrame:
+    """Lee (en orden de partición) solo las particiones de `valores`, o todas."""
+    carpeta = Path(carpeta)
+    manifiesto = leer_manifiesto(carpeta)
+    elegidas = manifiesto["particiones"]
+    if valores is not None:
+        pedidos = {_valor_json(v) for v in valores}
+        elegidas = [p for p in elegidas if p["valor"] in pedidos]
+
+    tablas = [pq.read_table(carpeta / p["archivo"], columns=columnas, memory_map=True) for p in elegidas]
+    if not tablas:
+        # sin particiones elegidas: DataFrame vacío con el esquema de cualquiera de ellas
+        if not manifiesto["particiones"]:
+            return pd.DataFrame(columns=columnas)
+        muestra = pq.read_table(carpeta / manifiesto["particiones"][0]["archivo"], columns=columnas)
+        return muestra.slice(0, 0).to_pandas()
+    # todas al esquema de la primera (con su metadata de pandas): unifica el ancho de código
+    # de los categóricos y, en una capa escrita antes de que escribir_particiones casteara,
+    # vuelve a tipar las particiones reescritas en vez de degradar la capa a texto/float
+    esquema = tablas[0].schema
+    for t in tablas[1:]:
+        esquema = _esquema_capa(esquema, t.schema)
+    tablas = [_a_esquema(t, esquema, f"{carpeta} {p['archivo']}") for t, p in zip(tablas, elegidas)]
+    return pa.concat_tables(tablas).to_pandas()
+
+
+def iterar_capa(ruta: Path, tam_lote: int = 500_000, columnas: list[str] | None = None):
+    """
+    Lee una capa por lotes de hasta `tam_lote` filas (DataFrames), sin cargarla entera.
+    Mismo fallback que leer_capa: Parquet si existe, si no el CSV hermano.
+    """
+    ruta = Path(ruta)
+    if ruta.suffix == ".parquet" and ruta.exists():
+        archivo = pq.ParquetFile(ruta, memory_map=True)
+        for lote in archivo.iter_batches(batch_size=tam_lote, columns=columnas):
+            yield lote.to_pandas()
+        return
+
+    alternativa = ruta_csv(ruta)
+    if not alternativa.exists():
+        raise FileNotFoundError(f"No existe la capa {ruta} (ni {alternativa})")
+    yield from pd.read_csv(alternativa, usecols=columnas, chunksize=tam_lote)
+
+
+class EscritorCapa:
+    """
+    Escribe una capa por lotes: Parquet (un row group por lote) + export CSV en append.
+    Los dos se escriben en un tmp y se renombran al cerrar, como escribir_capa: una
+    corrida que falla a mitad no deja ni el Parquet ni el CSV truncados.
+
+        with EscritorCapa(ruta, esquema=ESQUEMA) as esc:
+            for df in lotes:
+                esc.escribir(df)
+
+    Sin `esquema`, el del Parquet se infiere del primer lote: una columna toda nula en
+    ese lote queda de tipo null y un lote posterior con valores no se puede castear.
+    Quien conoce sus columnas debería pasar el esquema explícito.
+    """
+
+    def __init__(self, ruta: Path, exportar_csv: bool | None = None, esquema: pa.Schema | None = None):
+        self.ruta = Path(ruta).with_suffix(".parquet")
+        self.exportar_csv = EXPORTAR_CSV if exportar_csv is None else exportar_csv
+        self.filas = 0
+        self._tmp = self.ruta.with_name(f"{self.ruta.name}.{os.getpid()}.tmp")
+        self._csv = ruta_csv(self.ruta)
+        self._tmp_csv = self._csv.with_name(f"{self._csv.name}.{os.getpid()}.tmp")
+        self._writer = None
+        self._esquema = esquema
+        self._cerrado = False
+
+    def escribir(self, df: pd.DataFrame) -> None:
+        # con esquema explícito from_pandas castea cada lote (y agrega la metadata de pandas)
+        tabla = pa.Table.from_pandas(df, schema=self._esquema, preserve_index=False)
+        if self._writer is None:
+            self.ruta.parent.mkdir(parents=True, exist_ok=True)
+            self._esquema = tabla.schema
+            self._writer = pq.ParquetWriter(self._tmp, self._esquema)
+        else:
+            # los categóricos pueden cambiar de ancho de código entre lotes (int8 -> int16)
+            tabla = tabla.cast(self._esquema)
+        self._writer.write_table(tabla)
+
+        if self.exportar_csv:
+            df.to_csv(self._tmp_csv, mode="w" if self.filas == 0 else "a",
+                      header=self.filas == 0, index=False, encoding="utf-8")
+        self.filas += len(df)
+
+    def cerrar(self, vacio: pd.DataFrame | None = None) -> Path:
+        """`vacio`: DataFrame sin filas con las columnas esperadas, por si no llegó ningún lote."""
+        if self._cerrado:
+            return self.ruta
+        if self._writer is None and vacio is not None:
+            self.escribir(vacio)
+        if self._writer is not None:
+            self._writer.close()
+            self._tmp.replace(self.ruta)
+            if self.exportar_csv:
+                self._tmp_csv.replace(self._csv)
+        self._cerrado = True
+        return self.ruta
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        if tipo is None:
+            self.cerrar()
+        elif not self._cerrado:
+            if self._writer is not None:
+                self._writer.close()
+            self._tmp.unlink(missing_ok=True)
+            self._tmp_csv.unlink(missing_ok=True)
+
+
+def exportar_a_csv(df: pd.DataFrame, ruta: Path) -> Path:
+    ruta = Path(ruta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(ruta, index=False, encoding="utf-8")
+    return ruta
+
+
+def main(argv: list[str] | None = None):
+    rutas = sys.argv[1:] if argv is None else argv
+    if not rutas:
+        print("Uso: python src/almacen.py <capa.parquet | capa particionada> [...]")
+        sys.exit(1)
+    for r in rutas:
+        df = leer_capa(Path(r))
+        destino = exportar_a_csv(df, ruta_csv(Path(r)))
+        print(f"OK -> {destino} | filas={len(df)}")
+
+
+if __name__ == "__main__":
+    main()
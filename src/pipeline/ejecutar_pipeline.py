@@ -0,0 +1,229 @@
+"""
+ejecutar_pipeline.py
+====================
+Corre el pipeline completo en un solo proceso:
+
+    parseo -> transformacion -> qa -> alias -> enriquecimiento -> enhanced
+
+Las etapas se declaran como un DAG (cada una dice qué capas consume y cuáles produce)
+y se pasan los DataFrames en memoria; cada capa igual se escribe con almacen.escribir_capa
+para que las etapas sueltas y la próxima corrida la encuentren.
+
+Cada etapa tiene una huella = hash de su código + sus archivos de entrada externos
+(txt de RSSSF, tablas de referencia) + las huellas de las etapas de las que depende.
+Si la huella no cambió desde la última corrida y sus capas (y exportes, como el CSV
+único de enhanced) existen, la etapa se salta (y sus capas solo se leen del disco si
+alguna etapa posterior las necesita).
+Una re-corrida sin cambios no lee ni escribe ninguna capa.
+
+Uso:
+    python src/pipeline/ejecutar_pipeline.py
+    python src/pipeline/ejecutar_pipeline.py --forzar --workers 4
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from graphlib import TopologicalSorter
+from pathlib import Path
+from typing import Callable
+
+import pandas as pd
+
+RAIZ_SRC = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(RAIZ_SRC))
+
+import almacen
+from almacen import escribir_capa, existe_capa, leer_capa
+from pipeline import generar_enhanced
+from qa import chequeos_qa
+from referencia import alias_robusto, diccionario_equipos, enriquecer_partidos_con_referencia
+from rsssf import parser_rsssf, transformar_rsssf_a_v1
+
+RUTA_HUELLAS = Path("datos/cache/pipeline_huellas.json")
+
+
+@dataclass
+class Etapa:
+    nombre: str
+    funcion: Callable[[dict[str, pd.DataFrame]], dict[str, pd.DataFrame]]
+    consume: list[str]               # capas que necesita (producidas por otras etapas)
+    produce: dict[str, Path]         # capa -> ruta Parquet (o directorio, si es particionada)
+    codigo: list[Path]               # archivos que definen la versión de la etapa
+    entradas: Callable[[], list[Path]] = field(default=lambda: [])  # archivos externos
+    exportes: list[Path] = field(default_factory=list)  # archivos derivados que también deja (CSV único)
+
+
+# ====== ETAPAS ======
+
+def _parseo(capas: dict[str, pd.DataFrame], workers: int = 1) -> dict[str, pd.DataFrame]:
+    rutas = sorted(parser_rsssf.CARPETA_RSSSF.glob("*.txt"))
+    partidos, goles = parser_rsssf.parsear_capas(rutas, workers=workers)
+    parser_rsssf.reportar_goles_descuadrados(parser_rsssf.goles_descuadrados(partidos, goles))
+    return {"partidos_crudos": partidos, "goles_crudos": goles}
+
+
+def _transformacion(capas: dict[str, pd.DataFrame]) -> dict[str, pd.DataFrame]:
+    return {"partidos_v1": transformar_rsssf_a_v1.transformar(capas["partidos_crudos"])}
+
+
+def _qa(capas: dict[str, pd.DataFrame]) -> dict[str, pd.DataFrame]:
+    validos, invalidos = chequeos_qa.validar_incremental(capas["partidos_v1"])
+    return {"validos": validos, "invalidos": invalidos}
+
+
+def _alias(capas: dict[str, pd.DataFrame]) -> dict[str, pd.DataFrame]:
+    mapa = alias_robusto.cargar_indice_alias()
+    df, _ = alias_robusto.aplicar_alias(capas["validos"], mapa)
+    df = diccionario_equipos.asignar_ids(df, diccionario_equipos.cargar_ids(mapa=mapa))
+    return {"normalizado": df}
+
+
+def _enriquecimiento(capas: dict[str, pd.DataFrame]) -> dict[str, pd.DataFrame]:
+    ref = pd.read_csv(enriquecer_partidos_con_referencia.RUTA_REF)
+    df, _ = enriquecer_partidos_con_referencia.enriquecer(capas["normalizado"], ref)
+    return {"enriquecido": df}
+
+
+def _enhanced(capas: dict[str, pd.DataFrame]) -> dict[str, pd.DataFrame]:
+    df = generar_enhanced.generar_enhanced(capas["enriquecido"])
+    generar_enhanced.escribir_auditoria(df)
+    return {"enhanced": df}
+
+
+def _modulo(modulo) -> Path:
+    return Path(modulo.__file__)
+
+
+def definir_etapas(workers: int = 1) -> list[Etapa]:
+    comun = [_modulo(almacen)]
+    return [
+        Etapa("parseo", lambda capas: _parseo(capas, workers), [],
+              {"partidos_crudos": parser_rsssf.RUTA_SALIDA, "goles_crudos": parser_rsssf.RUTA_SALIDA_GOLES},
+              [_modulo(parser_rsssf)] + comun,
+              lambda: sorted(parser_rsssf.CARPETA_RSSSF.glob("*.txt"))),
+        Etapa("transformacion", _transformacion, ["partidos_crudos"],
+              {"partidos_v1": transformar_rsssf_a_v1.RUTA_SALIDA},
+              [_modulo(transformar_rsssf_a_v1)] + comun),
+        Etapa("qa", _qa, ["partidos_v1"],
+              {"validos": chequeos_qa.RUTA_VALIDOS, "invalidos": chequeos_qa.RUTA_INVALIDOS},
+              [_modulo(chequeos_qa)] + comun),
+        Etapa("alias", _alias, ["validos"],
+              {"normalizado": alias_robusto.RUTA_SALIDA},
+              [_modulo(alias_robusto), _modulo(diccionario_equipos)] + comun,
+              lambda: [alias_robusto.RUTA_ALIAS, diccionario_equipos.RUTA_IDS]),
+        Etapa("enriquecimiento", _enriquecimiento, ["normalizado"],
+              {"enriquecido": enriquecer_partidos_con_referencia.RUTA_SALIDA},
+              [_modulo(enriquecer_partidos_con_referencia)] + comun,
+              lambda: [enriquecer_partidos_con_referencia.RUTA_REF]),
+        Etapa("enhanced", _enhanced, ["enriquecido"],
+              {"enhanced": generar_enhanced.RUTA_SALIDA},
+              [_modulo(generar_enhanced)] + comun,
+              exportes=[almacen.ruta_csv(generar_enhanced.RUTA_SALIDA)] if almacen.EXPORTAR_CSV else []),
+    ]
+
+
+# ====== DAG + HUELLAS ======
+
+def ordenar(etapas: list[Etapa]) -> list[Etapa]:
+    productor = {capa: e.nombre for e in etapas for capa in e.produce}
+    faltan = sorted({c for e in etapas for c in e.consume} - set(productor))
+    if faltan:
+        raise ValueError(f"Capas consumidas que ninguna etapa produce: {faltan}")
+
+    grafo = {e.nombre: {productor[c] for c in e.consume} for e in etapas}
+    por_nombre = {e.nombre: e for e in etapas}
+    return [por_nombre[n] for n in TopologicalSorter(grafo).static_order()]
+
+
+def _hash_archivo(ruta: Path) -> str:
+    return hashlib.sha256(ruta.read_bytes()).hexdigest()
+
+
+def calcular_huella(etapa: Etapa, huellas_dependencias: list[str]) -> str:
+    h = hashlib.sha256()
+    for ruta in etapa.codigo + etapa.entradas():
+        h.update(str(ruta).encode("utf-8"))
+        h.update(_hash_archivo(ruta).encode("ascii") if ruta.exists() else b"-")
+    for huella in sorted(huellas_dependencias):
+        h.update(huella.encode("ascii"))
+    return h.hexdigest()
+
+
+def cargar_huellas(ruta: Path = RUTA_HUELLAS) -> dict[str, str]:
+    if not ruta.exists():
+        return {}
+    return json.loads(ruta.read_text(encoding="utf-8"))
+
+
+def guardar_huellas(huellas: dict[str, str], ruta: Path = RUTA_HUELLAS) -> None:
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    tmp = ruta.with_name(f"{ruta.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(huellas, indent=2, sort_keys=True), encoding="utf-8")
+    tmp.replace(ruta)
+
+
+def ejecutar(etapas: list[Etapa], forzar: bool = False, ruta_huellas: Path = RUTA_HUELLAS) -> dict[str, str]:
+    """Corre el DAG. Devuelve el estado de cada etapa: "ejecutada" o "sin cambios"."""
+    etapas = ordenar(etapas)
+    productor = {capa: e for e in etapas for capa in e.produce}
+    previas = cargar_huellas(ruta_huellas)
+    huellas: dict[str, str] = {}
+    capas: dict[str, pd.DataFrame] = {}
+    estado: dict[str, str] = {}
+
+    def obtener(capa: str) -> pd.DataFrame:
+        # la capa de una etapa salteada se lee del disco solo cuando alguien la necesita
+        if capa not in capas:
+            capas[capa] = leer_capa(productor[capa].produce[capa])
+        return capas[capa]
+
+    for etapa in etapas:
+        dependencias = sorted({productor[c].nombre for c in etapa.consume})
+        huella = calcular_huella(etapa, [huellas[d] for d in dependencias])
+        huellas[etapa.nombre] = huella
+
+        al_dia = (previas.get(etapa.nombre) == huella
+                  and all(existe_capa(r) for r in etapa.produce.values())
+                  and all(r.exists() for r in etapa.exportes))
+        if al_dia and not forzar:
+            print(f"SIN CAMBIOS -> {etapa.nombre}")
+            estado[etapa.nombre] = "sin cambios"
+            continue
+
+        t0 = time.perf_counter()
+        salidas = etapa.funcion({c: obtener(c) for c in etapa.consume})
+        for capa, ruta in etapa.produce.items():
+            escribir_capa(salidas[capa], ruta)
+        capas.update(salidas)
+
+        # se guarda después de cada etapa: si algo falla más adelante, lo hecho no se repite
+        previas[etapa.nombre] = huella
+        guardar_huellas(previas, ruta_huellas)
+
+        filas = " | ".join(f"{c}={len(df)}" for c, df in salidas.items())
+        print(f"OK -> {etapa.nombre} | {filas} | {time.perf_counter() - t0:.2f}s")
+        estado[etapa.nombre] = "ejecutada"
+
+    return estado
+
+
+def main(argv: list[str] | None = None):
+    ap = argparse.ArgumentParser(description="Corre el pipeline completo en un proceso, salteando etapas sin cambios")
+    ap.add_argument("--forzar", action="store_true", help="ignora las huellas y corre todas las etapas")
+    ap.add_argument("--workers", type=int, default=1, help="procesos para el parseo (1 = secuencial)")
+    args = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    estado = ejecutar(definir_etapas(args.workers), forzar=args.forzar)
+    ejecutadas = sum(1 for e in estado.values() if e == "ejecutada")
+    print(f"\nPipeline: {ejecutadas} etapas ejecutadas, {len(estado) - ejecutadas} sin cambios "
+          f"| {time.perf_counter() - t0:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
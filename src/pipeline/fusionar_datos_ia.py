@@ -2,25 +2,36 @@
 fusionar_datos_ia.py
 =====================
 Fusiona filas generadas por IA (o cualquier fuente externa) con el dataset enhanced.
-El CSV de entrada debe tener las mismas 21 columnas que partidos_rsssf1_enhanced.csv.
+El CSV de entrada debe tener las 21 columnas de datos de partidos_rsssf1_enhanced.csv;
+equipo_local_id / equipo_visitante_id se calculan desde datos/referencias/equipos_ids.csv.
 
 Uso:
     python src/pipeline/fusionar_datos_ia.py datos/externos/completado_ia_2011.csv
 
 El script:
   1. Valida que las columnas coincidan.
-  2. Detecta y reporta duplicados entre el nuevo CSV y el existente.
-  3. Aplica mini-QA: resultado consistente con goles, fechas válidas, temporada en rango.
-  4. Concatena y exporta un nuevo partidos_rsssf1_enhanced.csv.
+  2. Detecta y reporta duplicados entre el nuevo CSV y el existente (hash de 64 bits
+     de temporada|fecha|equipo_local|equipo_visitante).
+  3. Aplica mini-QA vectorizado: resultado consistente con goles, fechas ISO 8601 válidas,
+     temporada en rango; los errores se reportan por fila.
+  4. Intercala las filas nuevas por (temporada, fecha) y reescribe solo las particiones
+     de las temporadas afectadas de partidos_rsssf1_enhanced (+ su parte.csv si el export
+     CSV está activo, y el CSV único partidos_rsssf1_enhanced.csv armado con los parte.csv).
 """
 
 from pathlib import Path
+import numpy as np
 import pandas as pd
 import sys
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # src/, para importar almacen
+from almacen import escribir_particiones, existe_capa, leer_capa, leer_manifiesto
+from qa.chequeos_qa import CLAVE_PARTIDO, contenidos_en, parsear_fecha
+from referencia.diccionario_equipos import asignar_ids, cargar_ids
 
-RUTA_BASE = Path("datos/procesados/partidos_rsssf1_enhanced.csv")
-RUTA_SALIDA = Path("datos/procesados/partidos_rsssf1_enhanced.csv")
+
+RUTA_BASE = Path("datos/procesados/partidos_rsssf1_enhanced")  # capa particionada por temporada
+RUTA_SALIDA = Path("datos/procesados/partidos_rsssf1_enhanced")
 
 COLUMNAS_ESPERADAS = [
     "temporada", "competicion", "fase", "instancia", "fecha",
@@ -40,38 +51,134 @@ def resultado_esperado(gl: int, gv: int) -> str:
     return "E"
 
 
+def _enteros(serie: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (valores truncados a entero, máscara de válidos), con el criterio de int(valor):
+    números no nulos, o texto que sea un entero literal ("3", " -1 "; no "3.0").
+    """
+    if pd.api.types.is_numeric_dtype(serie):
+        numeros = pd.to_numeric(serie, errors="coerce")
+        validos = numeros.notna().to_numpy()
+    else:
+        texto = serie.astype(str)
+        validos = (serie.notna() & texto.str.fullmatch(r"\s*[+-]?\d+\s*")).to_numpy(dtype=bool)
+        numeros = pd.to_numeric(texto.where(validos).str.strip(), errors="coerce")
+    return np.trunc(numeros.fillna(0).to_numpy(dtype=float)).astype(np.int64), validos
+
+
+def _fechas_invalidas(serie: pd.Series) -> np.ndarray:
+    """
+    True donde la fecha no es ISO 8601: se parsea con el mismo formato que parsear_fecha,
+    así que una fecha que pasa la validación nunca queda como NaT en fecha_parseada
+    ("05/03/2011" es inválida). Se parsea una vez por valor distinto; los que dan NaT
+    ("nan", "") se confirman de a uno, porque NaT no es error.
+    """
+    codigos, valores = pd.factorize(serie.astype(str), use_na_sentinel=False)
+    valores = pd.Series(valores.astype(object))
+    parseadas = pd.to_datetime(valores, format="ISO8601", errors="coerce")
+    invalido = np.zeros(len(valores), dtype=bool)
+    for j in np.flatnonzero(parseadas.isna().to_numpy()):
+        try:
+            pd.to_datetime(valores[j], format="ISO8601")
+        except Exception:
+            invalido[j] = True
+    return invalido[codigos]
+
+
 def validar_nuevo_csv(df_nuevo: pd.DataFrame) -> list[str]:
+    """
+    Valida columna a columna (sin iterar filas). Devuelve los errores fila por fila,
+    en el orden: resultado/goles, fecha, temporada.
+    """
     errores = []
     faltantes = [c for c in COLUMNAS_ESPERADAS if c not in df_nuevo.columns]
     if faltantes:
         errores.append(f"Columnas faltantes: {faltantes}")
         return errores
 
-    for i, row in df_nuevo.iterrows():
-        try:
-            gl = int(row["goles_local"])
-            gv = int(row["goles_visitante"])
-            esperado = resultado_esperado(gl, gv)
-            if str(row["resultado"]).strip() != esperado:
-                errores.append(
-                    f"Fila {i}: resultado '{row['resultado']}' inconsistente con goles {gl}-{gv} (esperado '{esperado}')"
-                )
-        except (ValueError, TypeError):
-            errores.append(f"Fila {i}: goles no numéricos")
-
-        try:
-            pd.to_datetime(str(row["fecha"]))
-        except Exception:
-            errores.append(f"Fila {i}: fecha '{row['fecha']}' inválida")
-
-        try:
-            t = int(row["temporada"])
-            if not (1996 <= t <= 2024):
-                errores.append(f"Fila {i}: temporada {t} fuera de rango 1996-2024")
-        except (ValueError, TypeError):
-            errores.append(f"Fila {i}: temporada no válida")
-
-    return errores
+    filas = df_nuevo.index.to_numpy()
+    por_fila: list[tuple[int, int, str]] = []  # (posición, orden del chequeo, mensaje)
+
+    def agregar(mascara: np.ndarray, orden: int, mensaje) -> None:
+        for pos in np.flatnonzero(mascara):
+            por_fila.append((pos, orden, mensaje(pos)))
+
+    gl, gl_ok = _enteros(df_nuevo["goles_local"])
+    gv, gv_ok = _enteros(df_nuevo["goles_visitante"])
+    goles_ok = gl_ok & gv_ok
+    esperado = np.where(gl > gv, "L", np.where(gl < gv, "V", "E"))
+    resultado = df_nuevo["resultado"].to_numpy(dtype=object)
+    resultado_txt = df_nuevo["resultado"].astype(str).str.strip().to_numpy(dtype=object)
+
+    agregar(goles_ok & (resultado_txt != esperado), 0, lambda i: (
+        f"Fila {filas[i]}: resultado '{resultado[i]}' inconsistente con goles {gl[i]}-{gv[i]} (esperado '{esperado[i]}')"))
+    agregar(~goles_ok, 0, lambda i: f"Fila {filas[i]}: goles no numéricos")
+
+    fecha = df_nuevo["fecha"].to_numpy(dtype=object)
+    agregar(_fechas_invalidas(df_nuevo["fecha"]), 1, lambda i: f"Fila {filas[i]}: fecha '{fecha[i]}' inválida")
+
+    temporada, temporada_ok = _enteros(df_nuevo["temporada"])
+    agregar(temporada_ok & ((temporada < 1996) | (temporada > 2024)), 2,
+            lambda i: f"Fila {filas[i]}: temporada {temporada[i]} fuera de rango 1996-2024")
+    agregar(~temporada_ok, 2, lambda i: f"Fila {filas[i]}: temporada no válida")
+
+    por_fila.sort(key=lambda e: (e[0], e[1]))
+    return errores + [m for _, _, m in por_fila]
+
+
+def hash_clave_texto(df: pd.DataFrame) -> np.ndarray:
+    """
+    Hash de 64 bits de la clave del partido, una por fila. Las columnas se pasan a texto
+    antes de hashear para comparar igual que la clave "temporada|fecha|local|visitante".
+    """
+    return pd.util.hash_pandas_object(df[CLAVE_PARTIDO].astype(str), index=False, categorize=False).to_numpy()
+
+
+def restaurar_tipos(df: pd.DataFrame, tipos: pd.Series) -> pd.DataFrame:
+    """
+    Devuelve df con los dtypes de la base (`tipos` = df_base.dtypes): el concat con las
+    filas leídas del CSV deja texto donde la base tiene categóricos y float/object donde
+    tiene ids Int32. Los categóricos se recalculan desde los valores, para no perder las
+    categorías que solo traen las filas nuevas.
+    """
+    return df.astype({
+        c: "category" if isinstance(t, pd.CategoricalDtype) else t
+        for c, t in tipos.items() if c in df.columns
+    })
+
+
+def fusionar_ordenado(df_base: pd.DataFrame, df_nuevo: pd.DataFrame, orden=("temporada", "fecha")) -> pd.DataFrame:
+    """
+    Igual a concat + sort_values(orden) estable, pero intercalando dos frames ya ordenados:
+    la base (ordenada una vez si hiciera falta) y las filas nuevas. Las claves se pasan a
+    enteros (temporada, código de fecha en orden lexicográfico) y cada fila nueva cae en
+    su searchsorted(side="right") dentro de la base, detrás de las filas de igual clave.
+    Con nulos en la clave se usa el sort de pandas.
+    """
+    juntos = pd.concat([df_base, df_nuevo], ignore_index=True)
+    claves = juntos[list(orden)]
+    if claves.isna().any().any() or not pd.api.types.is_integer_dtype(claves[orden[0]]):
+        return juntos.sort_values(list(orden)).reset_index(drop=True)
+
+    codigo_fecha, _ = pd.factorize(claves[orden[1]], sort=True)
+    clave = claves[orden[0]].to_numpy(dtype=np.int64) * (codigo_fecha.max() + 1) + codigo_fecha
+    n = len(df_base)
+    clave_base, clave_nueva = clave[:n], clave[n:]
+
+    orden_base = np.arange(n)
+    if n > 1 and not (np.diff(clave_base) >= 0).all():
+        orden_base = np.argsort(clave_base, kind="stable")
+    orden_nuevo = np.argsort(clave_nueva, kind="stable")
+
+    insercion = np.searchsorted(clave_base[orden_base], clave_nueva[orden_nuevo], side="right")
+    destino_nuevo = insercion + np.arange(len(orden_nuevo))
+    es_nuevo = np.zeros(len(juntos), dtype=bool)
+    es_nuevo[destino_nuevo] = True
+
+    posiciones = np.empty(len(juntos), dtype=np.int64)
+    posiciones[destino_nuevo] = n + orden_nuevo
+    posiciones[~es_nuevo] = orden_base
+    return juntos.take(posiciones).reset_index(drop=True)
 
 
 def main():
@@ -84,14 +191,11 @@ def main():
         print(f"ERROR: no existe {ruta_nuevo}")
         sys.exit(1)
 
-    if not RUTA_BASE.exists():
+    if not existe_capa(RUTA_BASE):
         print(f"ERROR: no existe {RUTA_BASE}. Correr el pipeline primero.")
         sys.exit(1)
 
-    df_base = pd.read_csv(RUTA_BASE)
     df_nuevo = pd.read_csv(ruta_nuevo)
-
-    print(f"Base: {len(df_base)} filas")
     print(f"Nuevo: {len(df_nuevo)} filas")
 
     # Validación
@@ -105,20 +209,24 @@ def main():
         print("\nCorregí los errores antes de fusionar.")
         sys.exit(1)
 
+    # Solo se leen (y después se reescriben) las temporadas que trae el CSV nuevo
+    temporadas = sorted(int(t) for t in df_nuevo["temporada"].unique())
+    df_base = leer_capa(RUTA_BASE, temporadas=temporadas)
+    total_base = sum(p["filas"] for p in leer_manifiesto(RUTA_BASE)["particiones"])
+    print(f"Base: {total_base} filas ({len(df_base)} en las temporadas {temporadas})")
+
     # Corregir resultado_norm y fecha_parseada automáticamente
     df_nuevo["resultado_norm"] = df_nuevo["resultado"]
-    df_nuevo["fecha_parseada"] = df_nuevo["fecha"]
-
-    # Detectar duplicados
-    clave = ["temporada", "fecha", "equipo_local", "equipo_visitante"]
-    claves_base = set(
-        df_base[clave].dropna().astype(str).agg("|".join, axis=1)
-    )
-    claves_nuevo = df_nuevo[clave].dropna().astype(str).agg("|".join, axis=1)
-    duplicados = claves_nuevo[claves_nuevo.isin(claves_base)]
-    if len(duplicados) > 0:
-        print(f"\n⚠️  {len(duplicados)} filas del CSV nuevo ya existen en la base. Se omitirán.")
-        df_nuevo = df_nuevo[~claves_nuevo.isin(claves_base)]
+    df_nuevo = parsear_fecha(df_nuevo)  # datetime como en la base (el Parquet no acepta texto ahí)
+
+    # Detectar duplicados (hash de 64 bits de la clave; filas con clave incompleta no cuentan)
+    completa_base = df_base[CLAVE_PARTIDO].notna().all(axis=1).to_numpy()
+    completa_nuevo = df_nuevo[CLAVE_PARTIDO].notna().all(axis=1).to_numpy()
+    hashes_base = np.unique(hash_clave_texto(df_base)[completa_base])
+    duplicado = completa_nuevo & contenidos_en(hash_clave_texto(df_nuevo), hashes_base)
+    if duplicado.any():
+        print(f"\n⚠️  {int(duplicado.sum())} filas del CSV nuevo ya existen en la base. Se omitirán.")
+        df_nuevo = df_nuevo[~duplicado]
 
     # Asegurar columnas en el orden correcto
     for col in COLUMNAS_ESPERADAS:
@@ -126,16 +234,19 @@ def main():
             df_nuevo[col] = ""
     df_nuevo = df_nuevo[COLUMNAS_ESPERADAS]
 
-    # Concatenar y ordenar
-    df_resultado = pd.concat([df_base, df_nuevo], ignore_index=True)
-    df_resultado = df_resultado.sort_values(["temporada", "fecha"]).reset_index(drop=True)
+    # Intercalar en orden (temporada, fecha)
+    df_resultado = fusionar_ordenado(df_base, df_nuevo)
+    # ids de equipo para las filas nuevas (y para una base generada antes de que existieran)
+    df_resultado = asignar_ids(df_resultado, cargar_ids())
+    df_resultado = restaurar_tipos(df_resultado, df_base.dtypes)
 
-    RUTA_SALIDA.parent.mkdir(parents=True, exist_ok=True)
-    df_resultado.to_csv(RUTA_SALIDA, index=False, encoding="utf-8")
+    # el export CSV (si está activo) es por partición: se reescribe solo el de las temporadas
+    # afectadas y el CSV único se rearma concatenando los parte.csv
+    escritas = escribir_particiones(df_resultado, RUTA_SALIDA)
 
-    print(f"\nOK -> {RUTA_SALIDA}")
+    print(f"\nOK -> {RUTA_SALIDA} | particiones reescritas={escritas}")
     print(f"Filas incorporadas: {len(df_nuevo)}")
-    print(f"Total dataset: {len(df_resultado)}")
+    print(f"Total dataset: {total_base + len(df_resultado) - len(df_base)}")
 
 
 if __name__ == "__main__":
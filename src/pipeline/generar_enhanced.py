@@ -1,7 +1,7 @@
 """
 generar_enhanced.py
 ====================
-Paso 6 del pipeline. Toma el CSV enriquecido, aplica correcciones programáticas
+Paso 6 del pipeline. Toma la capa enriquecida, aplica correcciones programáticas
 y exporta el dataset enhanced listo para Modelo-Libertadores.
 
 Correcciones aplicadas:
@@ -9,49 +9,103 @@ Correcciones aplicadas:
      dentro de cada temporada (el RSSSF a veces pone partidos antes del header).
   2. Normalización de campo 'resultado': asegura que sea L/V/E (no resultado_norm).
 
+La auditoría se escribe en reportes/auditoria_enhanced.md y, con los mismos datos,
+en reportes/auditoria_enhanced.json (resumen, cobertura temporada x fase, vacíos por
+columna, temporadas sin datos / sin eliminatorias).
+
 Limitaciones documentadas (requieren completado manual o via IA):
-  - 1997: grupos no parseados (formato sin espacios alrededor del guion)
-  - 1998: grupos parcialmente parseados
-  - 2012: grupos casi ausentes (formato sin guion entre equipos)
+  - 2012: 10 partidos de grupos en líneas sin fecha propia (mismo día que el partido anterior)
   - Eliminatorias 2000-2024: no parseadas (ver docs/prompt_completar_datos.md)
 """
 
+import json
 from pathlib import Path
+import numpy as np
 import pandas as pd
 import sys
 
-RUTA_ENTRADA = Path("datos/procesados/partidos_rsssf1_enriquecido.csv")
-RUTA_SALIDA = Path("datos/procesados/partidos_rsssf1_enhanced.csv")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # src/, para importar almacen
+from almacen import escribir_capa, leer_capa
+
+RUTA_ENTRADA = Path("datos/procesados/partidos_rsssf1_enriquecido.parquet")
+RUTA_SALIDA = Path("datos/procesados/partidos_rsssf1_enhanced")  # particionada por temporada (ver almacen)
 RUTA_AUDITORIA = Path("reportes/auditoria_enhanced.md")
+RUTA_AUDITORIA_JSON = RUTA_AUDITORIA.with_suffix(".json")
 
 TEMPORADAS_ESPERADAS = list(range(1996, 2025))
 FASES_ESPERADAS = {"Grupos", "Octavos", "Cuartos", "Semifinal", "Final"}
+FASES_AUDITORIA = ["Grupos", "Octavos", "Cuartos", "Semifinal", "Final"]  # columnas de la tabla de cobertura
 
 
 def corregir_instancia_grupos(df: pd.DataFrame) -> pd.DataFrame:
     df = df.copy()
     mask_grupos = df["fase"] == "Grupos"
-    for temporada in df["temporada"].unique():
-        idx = df[(df["temporada"] == temporada) & mask_grupos].index
-        df.loc[idx, "instancia"] = (
-            df.loc[idx, "instancia"]
-            .infer_objects(copy=False)
-            .ffill()
-            .bfill()
-        )
+    # ffill + bfill de instancia dentro de cada temporada, sobre los partidos de grupos
+    instancia = df.loc[mask_grupos, "instancia"].infer_objects(copy=False)
+    temporadas = df.loc[mask_grupos, "temporada"]
+    instancia = instancia.groupby(temporadas, sort=False).ffill()
+    df.loc[mask_grupos, "instancia"] = instancia.groupby(temporadas, sort=False).bfill()
     return df
 
 
-def generar_auditoria(df: pd.DataFrame) -> str:
+def contar_vacios(serie: pd.Series) -> int:
+    """Nulos + strings vacíos/solo espacios. En categóricas el strip se hace una vez por categoría."""
+    nulls = int(serie.isna().sum())
+    # texto: object, str o categórica (las capas Parquet conservan "" en vez de NaN)
+    if pd.api.types.is_numeric_dtype(serie) or pd.api.types.is_datetime64_any_dtype(serie):
+        return nulls
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        vacias = serie.cat.categories.astype(str).str.strip() == ""
+        codigos = serie.cat.codes.to_numpy()
+        return nulls + int(np.asarray(vacias)[codigos[codigos >= 0]].sum())
+    return nulls + int((serie.astype(str).str.strip() == "").sum())
+
+
+def resumir(df: pd.DataFrame) -> dict:
+    """
+    Todo lo que reporta la auditoría, en una pasada: una tabla temporada x fase
+    (crosstab) y un conteo de vacíos por columna. Es lo que se exporta a JSON.
+    """
+    cobertura = pd.crosstab(df["temporada"], df["fase"])
+    totales = df["temporada"].value_counts()  # incluye filas sin fase
+    cobertura = cobertura.reindex(index=TEMPORADAS_ESPERADAS, columns=FASES_AUDITORIA, fill_value=0)
+    totales = totales.reindex(TEMPORADAS_ESPERADAS, fill_value=0)
+
+    presentes = totales > 0
+    sin_eliminatorias = presentes & (totales == cobertura["Grupos"])
+
+    return {
+        "resumen": {
+            "total_partidos": len(df),
+            "temporadas_cubiertas": int(df["temporada"].nunique()),
+            "temporadas_esperadas": len(TEMPORADAS_ESPERADAS),
+            "temporada_min": int(df["temporada"].min()),
+            "temporada_max": int(df["temporada"].max()),
+            "promedio_goles_local": float(df["goles_local"].mean()),
+            "promedio_goles_visitante": float(df["goles_visitante"].mean()),
+        },
+        "cobertura": [
+            {"temporada": int(t), **{f: int(cobertura.at[t, f]) for f in FASES_AUDITORIA}, "total": int(totales[t])}
+            for t in TEMPORADAS_ESPERADAS
+        ],
+        "vacios": {c: n for c in df.columns if (n := contar_vacios(df[c])) > 0},
+        "temporadas_sin_datos": [int(t) for t in totales.index[~presentes]],
+        "temporadas_sin_eliminatorias": [int(t) for t in totales.index[sin_eliminatorias]],
+    }
+
+
+def generar_auditoria(df: pd.DataFrame, resumen: dict | None = None) -> str:
+    r = resumir(df) if resumen is None else resumen
+    res = r["resumen"]
     lineas = [
         "# Auditoría dataset enhanced — Copa Libertadores 1996–2024",
         "",
         "## Resumen",
-        f"- Total partidos: {len(df)}",
-        f"- Temporadas cubiertas: {df['temporada'].nunique()} de {len(TEMPORADAS_ESPERADAS)}",
-        f"- Rango: {df['temporada'].min()}–{df['temporada'].max()}",
-        f"- Promedio goles local: {df['goles_local'].mean():.2f}",
-        f"- Promedio goles visitante: {df['goles_visitante'].mean():.2f}",
+        f"- Total partidos: {res['total_partidos']}",
+        f"- Temporadas cubiertas: {res['temporadas_cubiertas']} de {res['temporadas_esperadas']}",
+        f"- Rango: {res['temporada_min']}–{res['temporada_max']}",
+        f"- Promedio goles local: {res['promedio_goles_local']:.2f}",
+        f"- Promedio goles visitante: {res['promedio_goles_visitante']:.2f}",
         "",
         "## Cobertura por temporada",
         "",
@@ -59,23 +113,17 @@ def generar_auditoria(df: pd.DataFrame) -> str:
         "|-----------|--------|---------|---------|-----------|-------|-------|",
     ]
 
-    for t in TEMPORADAS_ESPERADAS:
-        sub = df[df["temporada"] == t]
-        if len(sub) == 0:
+    def fmt(n, expected_min=1):
+        return str(n) if n >= expected_min else f"⚠️ {n}"
+
+    for fila in r["cobertura"]:
+        t = fila["temporada"]
+        if fila["total"] == 0:
             lineas.append(f"| {t} | ❌ | ❌ | ❌ | ❌ | ❌ | 0 |")
             continue
-        grupos = len(sub[sub["fase"] == "Grupos"])
-        octavos = len(sub[sub["fase"] == "Octavos"])
-        cuartos = len(sub[sub["fase"] == "Cuartos"])
-        semi = len(sub[sub["fase"] == "Semifinal"])
-        final = len(sub[sub["fase"] == "Final"])
-        total = len(sub)
-
-        def fmt(n, expected_min=1):
-            return str(n) if n >= expected_min else f"⚠️ {n}"
-
         lineas.append(
-            f"| {t} | {fmt(grupos,1)} | {fmt(octavos,0)} | {fmt(cuartos,1)} | {fmt(semi,1)} | {fmt(final,1)} | {total} |"
+            f"| {t} | {fmt(fila['Grupos'],1)} | {fmt(fila['Octavos'],0)} | {fmt(fila['Cuartos'],1)} "
+            f"| {fmt(fila['Semifinal'],1)} | {fmt(fila['Final'],1)} | {fila['total']} |"
         )
 
     lineas += [
@@ -84,12 +132,8 @@ def generar_auditoria(df: pd.DataFrame) -> str:
         "",
     ]
 
-    for col in df.columns:
-        nulls = df[col].isna().sum()
-        empties = (df[col].astype(str).str.strip() == "").sum() if df[col].dtype == object else 0
-        total_prob = nulls + empties
-        if total_prob > 0:
-            lineas.append(f"- `{col}`: {total_prob} valores vacíos/nulos de {len(df)}")
+    for col, total_prob in r["vacios"].items():
+        lineas.append(f"- `{col}`: {total_prob} valores vacíos/nulos de {res['total_partidos']}")
 
     lineas += [
         "",
@@ -99,27 +143,18 @@ def generar_auditoria(df: pd.DataFrame) -> str:
         "",
         "| Año | Tipo de gap | Estimación filas faltantes |",
         "|-----|------------|---------------------------|",
-        "| 1997 | Grupos completos (formato RSSSF sin espacio) | ~60 |",
-        "| 1998 | Grupos parciales (misma causa) | ~50 |",
-        "| 2012 | Grupos casi completos (formato sin guion) | ~105 |",
+        "| 2012 | Grupos: partidos en líneas sin fecha propia (mismo día que el anterior) | 10 |",
         "| 2000–2024 | Eliminatorias (Octavos, Cuartos, Semifinal, Final) | ~400 |",
         "",
-        "**Total estimado de filas faltantes**: ~615 partidos adicionales.",
+        "**Total estimado de filas faltantes**: ~410 partidos adicionales.",
         "",
-        "Con esas filas, el dataset pasaría de ~2575 a ~3190 partidos.",
+        "Con esas filas, el dataset pasaría de ~2707 a ~3117 partidos.",
     ]
 
     return "\n".join(lineas) + "\n"
 
 
-def main():
-    if not RUTA_ENTRADA.exists():
-        print(f"ERROR: no existe {RUTA_ENTRADA}. Correr el pipeline primero.")
-        sys.exit(1)
-
-    df = pd.read_csv(RUTA_ENTRADA)
-    print(f"Cargado: {len(df)} filas desde {RUTA_ENTRADA}")
-
+def generar_enhanced(df: pd.DataFrame) -> pd.DataFrame:
     # Corrección 1: instancia grupos
     antes = df["instancia"].isna().sum()
     df = corregir_instancia_grupos(df)
@@ -129,27 +164,37 @@ def main():
     # Corrección 2: resultado_norm ya está; asegurar que resultado sea L/V/E
     mapeo = {"LOCAL": "L", "VISITANTE": "V", "EMPATE": "E"}
     df["resultado"] = df["resultado"].replace(mapeo)
+    return df
 
-    # Exportar enhanced
-    RUTA_SALIDA.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(RUTA_SALIDA, index=False, encoding="utf-8")
-    print(f"OK -> {RUTA_SALIDA} | filas={len(df)}")
 
-    # Auditoría
-    auditoria = generar_auditoria(df)
+def escribir_auditoria(df: pd.DataFrame) -> None:
+    # Auditoría: Markdown para leer + JSON con los mismos datos para consumir
+    resumen = resumir(df)
     RUTA_AUDITORIA.parent.mkdir(parents=True, exist_ok=True)
-    RUTA_AUDITORIA.write_text(auditoria, encoding="utf-8")
-    print(f"Auditoría -> {RUTA_AUDITORIA}")
+    RUTA_AUDITORIA.write_text(generar_auditoria(df, resumen), encoding="utf-8")
+    RUTA_AUDITORIA_JSON.write_text(json.dumps(resumen, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    print(f"Auditoría -> {RUTA_AUDITORIA} + {RUTA_AUDITORIA_JSON.name}")
 
     # Resumen de gaps
-    temporadas_sin_datos = [t for t in TEMPORADAS_ESPERADAS if t not in df["temporada"].values]
-    print(f"\nTemporadas sin datos: {temporadas_sin_datos}")
-    sin_eliminatorias = [
-        t for t in TEMPORADAS_ESPERADAS
-        if t in df["temporada"].values
-        and len(df[(df["temporada"] == t) & (df["fase"] != "Grupos")]) == 0
-    ]
-    print(f"Temporadas sin eliminatorias: {sin_eliminatorias}")
+    print(f"\nTemporadas sin datos: {resumen['temporadas_sin_datos']}")
+    print(f"Temporadas sin eliminatorias: {resumen['temporadas_sin_eliminatorias']}")
+
+
+def main():
+    if not RUTA_ENTRADA.exists():
+        print(f"ERROR: no existe {RUTA_ENTRADA}. Correr el pipeline primero.")
+        sys.exit(1)
+
+    df = leer_capa(RUTA_ENTRADA)
+    print(f"Cargado: {len(df)} filas desde {RUTA_ENTRADA}")
+
+    df = generar_enhanced(df)
+
+    # Exportar enhanced
+    escribir_capa(df, RUTA_SALIDA)
+    print(f"OK -> {RUTA_SALIDA} | filas={len(df)}")
+
+    escribir_auditoria(df)
 
 
 if __name__ == "__main__":
@@ -1,10 +1,23 @@
+import argparse
+import hashlib
+import os
+import sys
+import time
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Callable
+import numpy as np
 import pandas as pd
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # src/, para importar almacen
+from almacen import EscritorCapa, escribir_capa, iterar_capa, leer_capa
 
-RUTA_DATOS = "datos/intermedios/partidos_rsssf.csv"
+
+RUTA_DATOS = Path("datos/intermedios/partidos_rsssf.parquet")
 CARPETA_REPORTES_QA = Path("reportes/qa")
 CARPETA_PROCESADOS = Path("datos/procesados")
+RUTA_VALIDOS = CARPETA_PROCESADOS / "partidos_rsssf1_validos.parquet"
+RUTA_INVALIDOS = CARPETA_PROCESADOS / "partidos_rsssf1_invalidos.parquet"
 
 
 COLUMNAS_OBLIGATORIAS = [
@@ -16,8 +29,8 @@ COLUMNAS_OBLIGATORIAS = [
 ]
 
 
-def cargar_datos(ruta: str) -> pd.DataFrame:
-    return pd.read_csv(ruta)
+def cargar_datos(ruta: Path) -> pd.DataFrame:
+    return leer_capa(ruta)
 
 
 def chequear_columnas_obligatorias(df: pd.DataFrame) -> list[str]:
@@ -25,58 +38,111 @@ def chequear_columnas_obligatorias(df: pd.DataFrame) -> list[str]:
     return faltantes
 
 
+MAPEO_RESULTADO = {
+    "LOCAL": "L",
+    "VISITANTE": "V",
+    "EMPATE": "E",
+    "L": "L",
+    "V": "V",
+    "E": "E",
+}
+
+
 def normalizar_resultado(df: pd.DataFrame) -> pd.DataFrame:
-    mapeo = {
-        "LOCAL": "L",
-        "VISITANTE": "V",
-        "EMPATE": "E",
-        "L": "L",
-        "V": "V",
-        "E": "E",
-    }
-    df = df.copy()
-    df["resultado_norm"] = (
-        df["resultado"]
-        .astype(str)
-        .str.strip()
-        .str.upper()
-        .map(mapeo)
-    )
-    return df
+    # strip/upper/map sobre los valores distintos (un puñado), no sobre cada fila
+    codigos, unicos = pd.factorize(df["resultado"])
+    normalizados = pd.Series(unicos).astype(str).str.strip().str.upper().map(MAPEO_RESULTADO)
+    valores = np.append(normalizados.to_numpy(dtype=object), None)  # código -1 (nulo) -> None
+    # assign no copia las columnas existentes (copy-on-write)
+    return df.assign(resultado_norm=pd.Series(valores[codigos], index=df.index, dtype="str"))
 
 
 def parsear_fecha(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    df["fecha_parseada"] = pd.to_datetime(df["fecha"], errors="coerce")
-    return df
+    # formato fijo (el esquema v1 usa YYYY-MM-DD): sin inferirlo de la primera fila, el
+    # resultado de cada fila no depende de qué otras filas vienen en el mismo lote
+    return df.assign(fecha_parseada=pd.to_datetime(df["fecha"], errors="coerce", format="ISO8601"))
+
+
+# ====== REGLAS ======
+# Cada regla devuelve una máscara booleana (True = la fila falla) sin filtrar ni copiar el DataFrame.
+
+CLAVE_PARTIDO = ["temporada", "fecha", "equipo_local", "equipo_visitante"]
+
+
+def mascara_duplicados(df: pd.DataFrame) -> np.ndarray:
+    return df.duplicated(subset=CLAVE_PARTIDO, keep=False).to_numpy()
+
 
+def mascara_temporada_fuera_rango(df: pd.DataFrame, min_anio=1996, max_anio=2024) -> np.ndarray:
+    temporada = df["temporada"].to_numpy()
+    return (temporada < min_anio) | (temporada > max_anio)
 
-def chequear_duplicados(df: pd.DataFrame) -> pd.DataFrame:
-    columnas_clave = ["temporada", "fecha", "equipo_local", "equipo_visitante"]
-    return df[df.duplicated(subset=columnas_clave, keep=False)].copy()
 
+def mascara_goles_invalidos(df: pd.DataFrame) -> np.ndarray:
+    return (df["goles_local"].to_numpy() < 0) | (df["goles_visitante"].to_numpy() < 0)
 
-def chequear_temporada_fuera_rango(df: pd.DataFrame, min_anio=1996, max_anio=2024) -> pd.DataFrame:
-    return df[(df["temporada"] < min_anio) | (df["temporada"] > max_anio)].copy()
 
+def mascara_fecha_invalida(df: pd.DataFrame) -> np.ndarray:
+    return df["fecha_parseada"].isna().to_numpy()
 
-def chequear_goles_invalidos(df: pd.DataFrame) -> pd.DataFrame:
-    return df[(df["goles_local"] < 0) | (df["goles_visitante"] < 0)].copy()
 
+def mascara_resultado_invalido(df: pd.DataFrame) -> np.ndarray:
+    return df["resultado_norm"].isna().to_numpy()
 
-def chequear_resultado_invalido(df: pd.DataFrame) -> pd.DataFrame:
-    return df[df["resultado_norm"].isna()].copy()
 
+def mascara_resultado_inconsistente(df: pd.DataFrame) -> np.ndarray:
+    gl = df["goles_local"].to_numpy()
+    gv = df["goles_visitante"].to_numpy()
+    esperado = np.select([gl > gv, gl < gv], [0, 1], default=2)
 
-def chequear_resultado_inconsistente(df: pd.DataFrame) -> pd.DataFrame:
-    condicion_l = (df["goles_local"] > df["goles_visitante"]) & (df["resultado_norm"] != "L")
-    condicion_v = (df["goles_local"] < df["goles_visitante"]) & (df["resultado_norm"] != "V")
-    condicion_e = (df["goles_local"] == df["goles_visitante"]) & (df["resultado_norm"] != "E")
-    return df[condicion_l | condicion_v | condicion_e].copy()
+    # comparamos códigos enteros (L=0, V=1, E=2) en vez de strings fila a fila;
+    # un resultado_norm nulo o fuera de dominio (-1) también es inconsistente
+    codigos, unicos = pd.factorize(df["resultado_norm"])
+    lookup = np.array([{"L": 0, "V": 1, "E": 2}.get(u, -1) for u in unicos] + [-1])
+    return lookup[codigos] != esperado
 
 
-def chequear_fecha_invalida(df: pd.DataFrame) -> pd.DataFrame:
-    return df[df["fecha_parseada"].isna()].copy()
+@dataclass(frozen=True)
+class ReglaQA:
+    nombre: str          # también es el nombre del reporte en reportes/qa/
+    etiqueta: str        # para el resumen por consola
+    mascara: Callable[[pd.DataFrame], np.ndarray]
+
+
+# una por regla de docs/reglas_qa.md aplicable a nivel fila (la cobertura es por temporada, no por fila)
+REGLAS_QA = [
+    ReglaQA("duplicados", "Duplicados (reporte)", mascara_duplicados),
+    ReglaQA("temporada_fuera_rango", "Temporadas fuera de rango", mascara_temporada_fuera_rango),
+    ReglaQA("goles_invalidos", "Goles inválidos", mascara_goles_invalidos),
+    ReglaQA("fecha_invalida", "Fechas inválidas", mascara_fecha_invalida),
+    ReglaQA("resultado_invalido", "Resultado inválido", mascara_resultado_invalido),
+    ReglaQA("resultado_inconsistente", "Resultado inconsistente", mascara_resultado_inconsistente),
+]
+
+
+def evaluar_reglas(df: pd.DataFrame, reglas: list[ReglaQA] = REGLAS_QA) -> tuple[np.ndarray, dict[str, float]]:
+    """
+    Matriz de máscaras (filas x reglas, bool; True = falla) y segundos que tomó cada regla.
+    Orden Fortran: cada regla escribe una columna contigua.
+    """
+    matriz = np.zeros((len(df), len(reglas)), dtype=bool, order="F")
+    tiempos = {}
+    for j, regla in enumerate(reglas):
+        t0 = time.perf_counter()
+        matriz[:, j] = regla.mascara(df)
+        tiempos[regla.nombre] = time.perf_counter() - t0
+    return matriz, tiempos
+
+
+def reglas_fallidas(matriz: np.ndarray, reglas: list[ReglaQA] = REGLAS_QA) -> pd.Categorical:
+    """Para cada fila de `matriz` (normalmente solo las inválidas), las reglas que falló separadas por ";"."""
+    # cada combinación de reglas es un entero (bit j = regla j): un string por combinación, no por fila
+    bits = np.zeros(len(matriz), dtype=np.int64)
+    for j in range(len(reglas)):
+        bits |= matriz[:, j].astype(np.int64) << j
+    combinaciones, inversa = np.unique(bits, return_inverse=True)
+    textos = [";".join(r.nombre for j, r in enumerate(reglas) if c >> j & 1) for c in combinaciones]
+    return pd.Categorical.from_codes(inversa, categories=textos)
 
 
 def escribir_reporte(nombre: str, df: pd.DataFrame) -> None:
@@ -85,72 +151,300 @@ def escribir_reporte(nombre: str, df: pd.DataFrame) -> None:
     df.to_csv(ruta, index=False)
 
 
-def main():
-    df = cargar_datos(RUTA_DATOS)
-
+def validar(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Corre todos los chequeos, escribe los reportes en CARPETA_REPORTES_QA e imprime el resumen.
+    Devuelve (válidos, inválidos).
+    """
     # Errores críticos: columnas obligatorias
-    faltantes = chequear_columnas_obligatorias(df)
-    if faltantes:
-        print("❌ QA CRÍTICO: faltan columnas obligatorias:", faltantes)
-        print("Se detiene el pipeline. Corregí el CSV de entrada.")
-        raise SystemExit(1)
+    detener_si_faltan_columnas(df)
 
     # Normalizaciones / parseos
     df = normalizar_resultado(df)
     df = parsear_fecha(df)
 
-    # Chequeos
-    duplicados = chequear_duplicados(df)
-    temporada_fuera_rango = chequear_temporada_fuera_rango(df)
-    goles_invalidos = chequear_goles_invalidos(df)
-    fecha_invalida = chequear_fecha_invalida(df)
-    resultado_invalido = chequear_resultado_invalido(df)
-    resultado_inconsistente = chequear_resultado_inconsistente(df)
+    # Chequeos: una columna booleana por regla
+    matriz, tiempos = evaluar_reglas(df)
+    return separar_y_reportar(df, matriz, tiempos)
+
+
+def separar_y_reportar(df: pd.DataFrame, matriz: np.ndarray,
+                       tiempos: dict[str, float]) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """A partir de la matriz de máscaras: escribe los reportes, imprime el resumen y devuelve (válidos, inválidos)."""
+    invalida = matriz.any(axis=1)
 
     # Reportes
-    if len(duplicados) > 0:
-        escribir_reporte("duplicados", duplicados)
-    if len(temporada_fuera_rango) > 0:
-        escribir_reporte("temporada_fuera_rango", temporada_fuera_rango)
-    if len(goles_invalidos) > 0:
-        escribir_reporte("goles_invalidos", goles_invalidos)
-    if len(fecha_invalida) > 0:
-        escribir_reporte("fecha_invalida", fecha_invalida)
-    if len(resultado_invalido) > 0:
-        escribir_reporte("resultado_invalido", resultado_invalido)
-    if len(resultado_inconsistente) > 0:
-        escribir_reporte("resultado_inconsistente", resultado_inconsistente)
-
-    # Clasificación válidos/ inválidos
-    # Una fila es inválida si aparece en cualquiera de estos conjuntos
-    indices_invalidos = set()
-    for dfi in [duplicados, temporada_fuera_rango, goles_invalidos, fecha_invalida, resultado_invalido, resultado_inconsistente]:
-        indices_invalidos.update(dfi.index.tolist())
-
-    df_invalidos = df.loc[sorted(indices_invalidos)].copy()
-    df_validos = df.drop(index=sorted(indices_invalidos)).copy()
-
-    CARPETA_PROCESADOS.mkdir(parents=True, exist_ok=True)
-    df_validos.to_csv(CARPETA_PROCESADOS / "partidos_rsssf1_validos.csv", index=False)
-    df_invalidos.to_csv(CARPETA_PROCESADOS / "partidos_rsssf1_invalidos.csv", index=False)
-
-    # Resumen
+    for j, regla in enumerate(REGLAS_QA):
+        if matriz[:, j].any():
+            escribir_reporte(regla.nombre, df[matriz[:, j]])
+
+    # Clasificación válidos / inválidos: una fila es inválida si falla cualquier regla
+    df_validos = df[~invalida]
+    df_invalidos = df[invalida].assign(reglas_qa=reglas_fallidas(matriz[invalida]))
+
+    imprimir_resumen(len(df), len(df_validos), len(df_invalidos), matriz.sum(axis=0), tiempos)
+
+    return df_validos, df_invalidos
+
+
+def detener_si_faltan_columnas(df: pd.DataFrame) -> None:
+    faltantes = chequear_columnas_obligatorias(df)
+    if faltantes:
+        print("❌ QA CRÍTICO: faltan columnas obligatorias:", faltantes)
+        print("Se detiene el pipeline. Corregí el CSV de entrada.")
+        raise SystemExit(1)
+
+
+def imprimir_resumen(total: int, validos: int, invalidos: int, fallas_por_regla, tiempos: dict[str, float],
+                     reglas: list[ReglaQA] = REGLAS_QA) -> None:
     print("=== QA DATASET LIBERTADORES ===\n")
-    print(f"Total de filas: {len(df)}")
-    print(f"Filas válidas: {len(df_validos)}")
-    print(f"Filas inválidas: {len(df_invalidos)}\n")
+    print(f"Total de filas: {total}")
+    print(f"Filas válidas: {validos}")
+    print(f"Filas inválidas: {invalidos}\n")
+
+    for regla, fallas in zip(reglas, fallas_por_regla):
+        print(f"{regla.etiqueta}: {int(fallas)}")
 
-    print(f"Duplicados (reporte): {len(duplicados)}")
-    print(f"Temporadas fuera de rango: {len(temporada_fuera_rango)}")
-    print(f"Goles inválidos: {len(goles_invalidos)}")
-    print(f"Fechas inválidas: {len(fecha_invalida)}")
-    print(f"Resultado inválido: {len(resultado_invalido)}")
-    print(f"Resultado inconsistente: {len(resultado_inconsistente)}")
+    print("\nTiempo por regla:")
+    for nombre, segundos in tiempos.items():
+        print(f"  {nombre:<24} {segundos * 1000:8.2f} ms")
 
     print("\nReportes QA en:", str(CARPETA_REPORTES_QA))
     print("Procesados en:", str(CARPETA_PROCESADOS))
     print("\n=== FIN QA ===")
 
 
+# ====== MODO POR LOTES ======
+# Para entradas que no entran en memoria: las reglas por fila se evalúan lote a lote y
+# válidos / inválidos / reportes se escriben a medida que salen. Los duplicados necesitan
+# ver toda la entrada, así que hay una primera pasada que solo lee las columnas de la clave
+# y guarda un hash de 64 bits por clave distinta.
+
+def hash_clave(df: pd.DataFrame) -> np.ndarray:
+    """Hash de 64 bits de temporada|fecha|equipo_local|equipo_visitante, uno por fila."""
+    return pd.util.hash_pandas_object(df[CLAVE_PARTIDO], index=False, categorize=False).to_numpy()
+
+
+class ConjuntoHashes:
+    """
+    Conjunto compacto de hashes uint64 (8 bytes por clave distinta, arrays numpy ordenados)
+    que además recuerda cuáles aparecieron más de una vez.
+    """
+
+    def __init__(self):
+        self.vistos = np.empty(0, dtype=np.uint64)
+        self._pendientes: list[np.ndarray] = []
+        self._n_pendientes = 0
+        self._repetidos: list[np.ndarray] = []
+
+    def agregar(self, hashes: np.ndarray) -> None:
+        unicos, conteos = np.unique(hashes, return_counts=True)
+        self._repetidos.append(unicos[conteos > 1])
+        self._pendientes.append(unicos)
+        self._n_pendientes += len(unicos)
+        # se fusiona cuando lo pendiente iguala a lo ya fusionado: costo amortizado O(n log n)
+        if self._n_pendientes >= max(len(self.vistos), 1_000_000):
+            self._compactar()
+
+    def _compactar(self) -> None:
+        # cada array pendiente ya es único: un conteo > 1 acá es una clave vista en dos lotes
+        unicos, conteos = np.unique(np.concatenate([self.vistos, *self._pendientes]), return_counts=True)
+        self._repetidos.append(unicos[conteos > 1])
+        self.vistos = unicos
+        self._pendientes = []
+        self._n_pendientes = 0
+
+    def repetidos(self) -> np.ndarray:
+        self._compactar()
+        return np.unique(np.concatenate(self._repetidos))
+
+
+def contenidos_en(hashes: np.ndarray, ordenados: np.ndarray) -> np.ndarray:
+    # búsqueda binaria sobre el array ya ordenado: O(lote · log n), sin re-ordenar nada por lote
+    if len(ordenados) == 0:
+        return np.zeros(len(hashes), dtype=bool)
+    pos = np.searchsorted(ordenados, hashes).clip(max=len(ordenados) - 1)
+    return ordenados[pos] == hashes
+
+
+def reglas_por_lotes(repetidos: np.ndarray) -> list[ReglaQA]:
+    # misma lista que REGLAS_QA, con duplicados resuelto contra los hashes de la primera pasada
+    duplicados = ReglaQA("duplicados", "Duplicados (reporte)", lambda df: contenidos_en(hash_clave(df), repetidos))
+    return [duplicados if r.nombre == "duplicados" else r for r in REGLAS_QA]
+
+
+def validar_por_lotes(ruta: Path, tam_lote: int, ruta_validos: Path = RUTA_VALIDOS,
+                      ruta_invalidos: Path = RUTA_INVALIDOS) -> tuple[int, int]:
+    """
+    Igual que validar + escribir_capa, pero leyendo `ruta` de a `tam_lote` filas.
+    La memoria queda acotada por el lote más el conjunto de hashes. Devuelve (válidos, inválidos).
+    """
+    conjunto = ConjuntoHashes()
+    for lote in iterar_capa(ruta, tam_lote, columnas=CLAVE_PARTIDO):
+        conjunto.agregar(hash_clave(lote))
+    reglas = reglas_por_lotes(conjunto.repetidos())
+
+    total = 0
+    fallas = np.zeros(len(reglas), dtype=np.int64)
+    tiempos = dict.fromkeys((r.nombre for r in reglas), 0.0)
+    reportes_abiertos: set[str] = set()
+    vacio_invalidos = None
+
+    with EscritorCapa(ruta_validos) as validos, EscritorCapa(ruta_invalidos) as invalidos:
+        for lote in iterar_capa(ruta, tam_lote):
+            if total == 0:
+                detener_si_faltan_columnas(lote)
+            lote = parsear_fecha(normalizar_resultado(lote))
+
+            matriz, t = evaluar_reglas(lote, reglas)
+            invalida = matriz.any(axis=1)
+            fallas += matriz.sum(axis=0)
+            for nombre, segundos in t.items():
+                tiempos[nombre] += segundos
+
+            for j, regla in enumerate(reglas):
+                if matriz[:, j].any():
+                    agregar_a_reporte(regla.nombre, lote[matriz[:, j]], nuevo=regla.nombre not in reportes_abiertos)
+                    reportes_abiertos.add(regla.nombre)
+
+            validos.escribir(lote[~invalida])
+            if invalida.any():
+                invalidos.escribir(lote[invalida].assign(reglas_qa=reglas_fallidas(matriz[invalida], reglas)))
+            vacio_invalidos = lote.iloc[:0].assign(reglas_qa=pd.Categorical([]))
+            total += len(lote)
+
+        if total == 0:
+            print(f"❌ QA CRÍTICO: {ruta} no tiene filas.")
+            raise SystemExit(1)
+        invalidos.cerrar(vacio=vacio_invalidos)
+
+    imprimir_resumen(total, validos.filas, invalidos.filas, fallas, tiempos, reglas)
+    return validos.filas, invalidos.filas
+
+
+def agregar_a_reporte(nombre: str, df: pd.DataFrame, nuevo: bool) -> None:
+    CARPETA_REPORTES_QA.mkdir(parents=True, exist_ok=True)
+    ruta = CARPETA_REPORTES_QA / f"{nombre}.csv"
+    df.to_csv(ruta, mode="w" if nuevo else "a", header=nuevo, index=False)
+
+
+# ====== MODO INCREMENTAL ======
+# Las reglas por fila (todas menos duplicados) dependen solo del contenido de la fila.
+# Se guarda un índice hash de fila -> (veredicto, resultado_norm, fecha_parseada) y en la
+# corrida siguiente solo se evalúan las filas cuyo hash no está. Los duplicados se
+# recalculan sobre los hashes de la clave de todas las filas (un duplicated sobre uint64),
+# así cualquier grupo de clave que cambió queda bien sin rastrearlo aparte.
+
+CARPETA_INDICE_QA = Path("datos/cache/qa")
+
+# cualquier cambio en este archivo (reglas, normalizaciones) invalida el índice
+VERSION_QA = hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:16]
+
+REGLAS_POR_FILA = [r for r in REGLAS_QA if r.nombre != "duplicados"]
+
+
+def hash_filas(df: pd.DataFrame) -> np.ndarray:
+    """Hash de 64 bits del contenido completo de cada fila."""
+    return pd.util.hash_pandas_object(df, index=False, categorize=False).to_numpy()
+
+
+def ruta_indice(carpeta: Path = CARPETA_INDICE_QA) -> Path:
+    return carpeta / f"indice-{VERSION_QA}.parquet"
+
+
+def _bits_desde_matriz(matriz: np.ndarray, reglas: list[ReglaQA]) -> np.ndarray:
+    # bit j = REGLAS_QA[j], sin importar qué subconjunto de reglas tenga `matriz`
+    bits = np.zeros(len(matriz), dtype=np.int64)
+    for k, regla in enumerate(reglas):
+        bits |= matriz[:, k].astype(np.int64) << REGLAS_QA.index(regla)
+    return bits
+
+
+def validar_incremental(df: pd.DataFrame, carpeta_indice: Path = CARPETA_INDICE_QA) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Mismo resultado que validar (válidos, inválidos y reportes), re-evaluando solo las filas
+    nuevas o cambiadas desde la última corrida. Actualiza el índice en `carpeta_indice`.
+    """
+    detener_si_faltan_columnas(df)
+
+    hashes = hash_filas(df)
+    ruta = ruta_indice(carpeta_indice)
+    indice = pd.read_parquet(ruta) if ruta.exists() else None
+
+    if indice is not None and len(indice):
+        pos = np.searchsorted(indice["hash_fila"].to_numpy(), hashes).clip(max=len(indice) - 1)
+        conocida = indice["hash_fila"].to_numpy()[pos] == hashes
+    else:
+        pos = np.zeros(len(df), dtype=np.int64)
+        conocida = np.zeros(len(df), dtype=bool)
+
+    # solo las filas nuevas o cambiadas pasan por normalización, parseo y reglas por fila
+    nuevas = parsear_fecha(normalizar_resultado(df[~conocida]))
+    matriz_nuevas, tiempos = evaluar_reglas(nuevas, REGLAS_POR_FILA)
+    posiciones_nuevas = np.flatnonzero(~conocida)
+    derivadas_nuevas = pd.DataFrame({
+        "hash_fila": hashes[~conocida],
+        "bits": _bits_desde_matriz(matriz_nuevas, REGLAS_POR_FILA),
+        "resultado_norm": nuevas["resultado_norm"].set_axis(posiciones_nuevas),
+        "fecha_parseada": nuevas["fecha_parseada"].set_axis(posiciones_nuevas),
+    }, index=posiciones_nuevas)
+
+    partes = [derivadas_nuevas]
+    if conocida.any():
+        partes.append(indice.iloc[pos[conocida]].set_axis(np.flatnonzero(conocida)))
+    derivadas = pd.concat(partes).sort_index() if len(partes) > 1 else derivadas_nuevas
+
+    df = df.assign(
+        resultado_norm=derivadas["resultado_norm"].set_axis(df.index),
+        fecha_parseada=derivadas["fecha_parseada"].set_axis(df.index),
+    )
+
+    # duplicados: siempre sobre todas las filas
+    t0 = time.perf_counter()
+    duplicada = pd.Series(hash_clave(df)).duplicated(keep=False).to_numpy()
+    tiempos = {"duplicados": time.perf_counter() - t0, **tiempos}
+
+    bits = derivadas["bits"].to_numpy() | (duplicada.astype(np.int64) << [r.nombre for r in REGLAS_QA].index("duplicados"))
+    matriz = np.zeros((len(df), len(REGLAS_QA)), dtype=bool, order="F")
+    for j in range(len(REGLAS_QA)):
+        matriz[:, j] = (bits >> j) & 1
+
+    print(f"QA incremental: {int((~conocida).sum())} filas nuevas o cambiadas de {len(df)} (re-evaluadas)\n")
+
+    # el índice nuevo tiene solo las filas actuales: no crece con versiones viejas de los datos
+    guardar_indice(derivadas.drop_duplicates("hash_fila").sort_values("hash_fila"), ruta)
+
+    return separar_y_reportar(df, matriz, tiempos)
+
+
+def guardar_indice(indice: pd.DataFrame, ruta: Path) -> None:
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    tmp = ruta.with_name(f"{ruta.name}.{os.getpid()}.tmp")
+    indice.to_parquet(tmp, index=False)
+    tmp.replace(ruta)
+    # índices de versiones anteriores del QA ya no sirven
+    for viejo in ruta.parent.glob("indice-*.parquet"):
+        if viejo != ruta:
+            viejo.unlink(missing_ok=True)
+
+
+def main(argv: list[str] | None = None):
+    ap = argparse.ArgumentParser(description="QA de la capa intermedia: separa válidos / inválidos y escribe reportes")
+    ap.add_argument("--lotes", type=int, default=0, metavar="FILAS",
+                    help="procesa la entrada de a FILAS filas con memoria acotada (0 = todo en memoria)")
+    ap.add_argument("--completo", action="store_true",
+                    help=f"re-evalúa todas las filas sin usar el índice incremental de {CARPETA_INDICE_QA}")
+    args = ap.parse_args(argv)
+
+    if args.lotes > 0:
+        validar_por_lotes(RUTA_DATOS, args.lotes)
+        return
+
+    df = cargar_datos(RUTA_DATOS)
+    df_validos, df_invalidos = validar(df) if args.completo else validar_incremental(df)
+    escribir_capa(df_validos, RUTA_VALIDOS)
+    escribir_capa(df_invalidos, RUTA_INVALIDOS)
+
+
 if __name__ == "__main__":
     main()
@@ -1,13 +1,23 @@
+import hashlib
+import os
+import sys
 from pathlib import Path
+import numpy as np
 import pandas as pd
 import unicodedata
 import re
 
-RUTA_ENTRADA = Path("datos/procesados/partidos_rsssf1_validos.csv")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # src/, para importar almacen
+from almacen import escribir_capa, leer_capa
+
+RUTA_ENTRADA = Path("datos/procesados/partidos_rsssf1_validos.parquet")
 RUTA_ALIAS = Path("datos/referencias/equipos_alias.csv")
-RUTA_SALIDA = Path("datos/procesados/partidos_rsssf1_validos_normalizado.csv")  # pisa, cambiá si querés
+RUTA_SALIDA = Path("datos/procesados/partidos_rsssf1_validos_normalizado.parquet")  # pisa, cambiá si querés
 RUTA_REPORTE = Path("reportes/referencias/alias_no_aplicados.csv")
 
+# alias compilado (cierre transitivo), se recompila cuando cambia el CSV
+CARPETA_INDICE_ALIAS = Path("datos/cache/alias")
+
 def norm(s: str) -> str:
     s = "" if s is None else str(s)
     s = s.replace("\u00a0", " ")
@@ -16,36 +26,120 @@ def norm(s: str) -> str:
     s = re.sub(r"\s+", " ", s)
     return s
 
-def main():
-    df = pd.read_csv(RUTA_ENTRADA, dtype=str)
-    alias = pd.read_csv(RUTA_ALIAS, dtype=str).fillna("")
+COLUMNAS_EQUIPO = ["equipo_local", "equipo_visitante"]
+
+def mapa_alias(alias: pd.DataFrame) -> pd.Series:
+    """
+    Compila la tabla de alias a una Serie alias normalizado -> canónico final.
+    Resuelve cadenas (A -> B, B -> C queda A -> C, B -> C) para que cada búsqueda
+    llegue directo al canónico. Falla con ValueError si un alias tiene dos canónicos
+    distintos o si hay un ciclo (alias == canónico no es ciclo: marca un nombre ya canónico).
+    """
+    alias = alias.fillna("")
+    pares = pd.DataFrame({
+        "alias": alias["equipo_alias"].map(norm),
+        "canonico": alias["equipo_canonico"].map(norm),
+    }).drop_duplicates()
+
+    conflictos = pares[pares["alias"].duplicated(keep=False)]
+    if not conflictos.empty:
+        detalle = "; ".join(f"{a} -> {sorted(g['canonico'])}" for a, g in conflictos.groupby("alias"))
+        raise ValueError(f"Alias con más de un canónico en {RUTA_ALIAS}: {detalle}")
+
+    directo = dict(zip(pares["alias"], pares["canonico"]))
+    final: dict[str, str] = {}
+    for inicio in directo:
+        camino = []
+        actual = inicio
+        while actual in directo and actual not in final and directo[actual] != actual:
+            if actual in camino:
+                ciclo = camino[camino.index(actual):] + [actual]
+                raise ValueError(f"Ciclo en {RUTA_ALIAS}: {' -> '.join(ciclo)}")
+            camino.append(actual)
+            actual = directo[actual]
+        destino = final.get(actual, actual)
+        for nombre in camino or [inicio]:
+            final[nombre] = destino
+
+    return pd.Series(final, dtype="str").sort_index()
+
+def _hash_alias(ruta: Path) -> str:
+    h = hashlib.sha256(Path(__file__).read_bytes())
+    h.update(Path(ruta).read_bytes())
+    return h.hexdigest()[:16]
 
-    # normalizar
-    df["equipo_local"] = df["equipo_local"].apply(norm)
-    df["equipo_visitante"] = df["equipo_visitante"].apply(norm)
+def cargar_indice_alias(ruta: Path = RUTA_ALIAS, carpeta: Path = CARPETA_INDICE_ALIAS) -> pd.Series:
+    """
+    Índice compilado alias -> canónico final. Se guarda como Parquet en `carpeta`, con
+    clave = hash del CSV + versión de este módulo: solo se recompila si alguno cambió.
+    """
+    indice = carpeta / f"indice-{_hash_alias(ruta)}.parquet"
+    if indice.exists():
+        tabla = pd.read_parquet(indice)
+        return pd.Series(tabla["canonico"].to_numpy(), index=tabla["alias"].to_numpy(), dtype="str")
 
-    alias["equipo_alias"] = alias["equipo_alias"].apply(norm)
-    alias["equipo_canonico"] = alias["equipo_canonico"].apply(norm)
+    mapa = mapa_alias(pd.read_csv(ruta, dtype=str))
+    carpeta.mkdir(parents=True, exist_ok=True)
+    tmp = indice.with_name(f"{indice.name}.{os.getpid()}.tmp")
+    pd.DataFrame({"alias": mapa.index, "canonico": mapa.to_numpy()}).to_parquet(tmp, index=False)
+    tmp.replace(indice)
+    for viejo in carpeta.glob("indice-*.parquet"):
+        if viejo != indice:
+            viejo.unlink(missing_ok=True)
+    return mapa
 
-    # claves normalizadas para merge
-    alias = alias.drop_duplicates(subset=["equipo_alias"])
-    mapa = alias.set_index("equipo_alias")["equipo_canonico"]
+def resolver_equipos(df: pd.DataFrame, mapa: pd.Series,
+                     columnas: list[str] = COLUMNAS_EQUIPO) -> tuple[pd.DataFrame, list[str]]:
+    """
+    Normaliza y resuelve las columnas de equipos trabajando sobre los nombres distintos:
+    factoriza todas las columnas juntas, normaliza y busca en el mapa cada nombre una
+    sola vez y vuelve a expandir por los códigos enteros. El costo de norm() depende de
+    la cantidad de equipos, no de partidos.
+    Devuelve (df, nombres normalizados que no están en el mapa, ordenados).
+    """
+    df = df.copy()
+    valores = pd.concat([df[c] for c in columnas], ignore_index=True)
+    codigos, unicos = pd.factorize(valores, use_na_sentinel=False)
 
-    # aplicar: si está en mapa, reemplazamos; si no, dejamos igual
-    antes_local = df["equipo_local"].copy()
-    antes_vis = df["equipo_visitante"].copy()
+    normalizados = pd.Index([norm(u) for u in unicos])
+    posicion = mapa.index.get_indexer(normalizados)
+    encontrado = posicion >= 0
+    resueltos = np.where(encontrado, mapa.to_numpy()[posicion], normalizados.to_numpy())
 
-    df["equipo_local"] = df["equipo_local"].map(lambda x: mapa.get(x, x))
-    df["equipo_visitante"] = df["equipo_visitante"].map(lambda x: mapa.get(x, x))
+    n = len(df)
+    for i, c in enumerate(columnas):
+        df[c] = pd.Series(resueltos[codigos[i * n:(i + 1) * n]], index=df.index, dtype="str")
+
+    # reporte: los que no estaban en el mapa (normalizados, sin repetir)
+    no_aplicados = sorted(set(normalizados[~encontrado]))
+    return df, no_aplicados
+
+def aplicar_alias(df: pd.DataFrame, mapa: pd.Series) -> tuple[pd.DataFrame, int]:
+    """
+    Normaliza equipo_local/equipo_visitante y los reemplaza por su canónico final
+    (`mapa`: índice de cargar_indice_alias o mapa_alias).
+    Escribe el reporte de nombres sin alias. Devuelve (df, cantidad de alias).
+    """
+    df, no_aplicados = resolver_equipos(df, mapa)
 
-    # reporte: cuáles NO se tocaron pero podrían estar “casi”
-    # (simple: los que no estaban en mapa)
-    no_aplicados = sorted(set(pd.concat([antes_local, antes_vis])) - set(mapa.index))
     RUTA_REPORTE.parent.mkdir(parents=True, exist_ok=True)
     pd.DataFrame({"equipo_no_en_alias": no_aplicados}).to_csv(RUTA_REPORTE, index=False, encoding="utf-8")
 
-    df.to_csv(RUTA_SALIDA, index=False, encoding="utf-8")
-    print(f"OK -> {RUTA_SALIDA} | filas={len(df)} | alias={len(mapa)}")
+    return df, len(mapa)
+
+def main():
+    df = leer_capa(RUTA_ENTRADA)
+    mapa = cargar_indice_alias()
+
+    df, n_alias = aplicar_alias(df, mapa)
+
+    # ids enteros de equipo al lado de los nombres ya canónicos
+    # (import acá: diccionario_equipos importa este módulo)
+    from referencia.diccionario_equipos import asignar_ids, cargar_ids
+    df = asignar_ids(df, cargar_ids(mapa=mapa))
+
+    escribir_capa(df, RUTA_SALIDA)
+    print(f"OK -> {RUTA_SALIDA} | filas={len(df)} | alias={n_alias}")
     print(f"Reporte -> {RUTA_REPORTE}")
 
 if __name__ == "__main__":
@@ -1,35 +1,27 @@
+import sys
 from pathlib import Path
-import pandas as pd
-import unicodedata
-import re
 
-RUTA_ENTRADA = Path("datos/procesados/partidos_rsssf1_validos_normalizado.csv")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # src/, para importar almacen
+from almacen import escribir_capa, leer_capa
+from referencia.alias_robusto import cargar_indice_alias, norm, resolver_equipos
+from referencia.diccionario_equipos import asignar_ids, cargar_ids
+
+RUTA_ENTRADA = Path("datos/procesados/partidos_rsssf1_validos_normalizado.parquet")
 RUTA_ALIAS = Path("datos/referencias/equipos_alias.csv")
-RUTA_SALIDA = Path("datos/procesados/partidos_rsssf1_validos_normalizado.csv")  # pisa el mismo (o cambiá nombre)
+RUTA_SALIDA = Path("datos/procesados/partidos_rsssf1_validos_normalizado.parquet")  # pisa el mismo (o cambiá nombre)
 
-def normalizar_nombre(s: str) -> str:
-    s = "" if s is None else str(s)
-    s = s.replace("\u00a0", " ")  # NBSP -> espacio normal
-    s = unicodedata.normalize("NFKC", s)  # normaliza unicode
-    s = s.strip()
-    s = re.sub(r"\s+", " ", s)  # colapsa espacios
-    return s
+# misma normalización que alias_robusto (NBSP, NFKC, espacios)
+normalizar_nombre = norm
 
 def main():
-    df = pd.read_csv(RUTA_ENTRADA)
-
-    alias = pd.read_csv(RUTA_ALIAS, dtype=str).fillna("")
-    alias["equipo_alias"] = alias["equipo_alias"].apply(normalizar_nombre)
-    alias["equipo_canonico"] = alias["equipo_canonico"].apply(normalizar_nombre)
-
-    # Mapa alias -> canónico
-    mapa = dict(zip(alias["equipo_alias"], alias["equipo_canonico"]))
+    df = leer_capa(RUTA_ENTRADA)
 
-    # Normalizar columnas equipos antes de reemplazar
-    df["equipo_local"] = df["equipo_local"].apply(normalizar_nombre).replace(mapa)
-    df["equipo_visitante"] = df["equipo_visitante"].apply(normalizar_nombre).replace(mapa)
+    # Índice compilado alias -> canónico final; la resolución es la de alias_robusto
+    mapa = cargar_indice_alias(RUTA_ALIAS)
+    df, _ = resolver_equipos(df, mapa)
+    df = asignar_ids(df, cargar_ids(mapa=mapa))
 
-    df.to_csv(RUTA_SALIDA, index=False, encoding="utf-8")
+    escribir_capa(df, RUTA_SALIDA)
     print(f"OK -> {RUTA_SALIDA} | filas={len(df)} | alias={len(mapa)}")
 
 if __name__ == "__main__":
@@ -0,0 +1,101 @@
+"""
+diccionario_equipos.py
+======================
+Diccionario persistente de equipos: un `team_id` entero y estable por equipo canónico.
+
+    python src/referencia/diccionario_equipos.py
+
+Lee equipos_referencia.csv y equipos_alias.csv, resuelve cada nombre a su canónico
+(índice compilado de alias_robusto) y agrega a datos/referencias/equipos_ids.csv los
+canónicos que todavía no tienen id. Es append-only: un id asignado no cambia ni se
+reutiliza, aunque el equipo desaparezca de las tablas o cambie el orden de las filas.
+
+Las etapas usan asignar_ids() para agregar equipo_local_id / equipo_visitante_id al
+lado de los nombres. Un alias resuelve al id de su canónico; un equipo que no está en
+el diccionario queda con <NA> (y ya figura en reportes/referencias/equipos_sin_match.csv).
+"""
+
+import sys
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # src/, para importar referencia.*
+from referencia.alias_robusto import RUTA_ALIAS, cargar_indice_alias, norm
+
+RUTA_REF = Path("datos/referencias/equipos_referencia.csv")
+RUTA_IDS = Path("datos/referencias/equipos_ids.csv")
+
+COLUMNAS_ID = {"equipo_local": "equipo_local_id", "equipo_visitante": "equipo_visitante_id"}
+
+
+def canonicos(ref: pd.DataFrame, mapa: pd.Series) -> list[str]:
+    """Canónicos distintos de la tabla maestra y de la tabla de alias, en orden de aparición."""
+    nombres = pd.concat([ref["equipo"].dropna().map(norm), pd.Series(mapa.to_numpy())], ignore_index=True)
+    nombres = nombres[nombres != ""].to_numpy()
+    resueltos = mapa.reindex(nombres).to_numpy()
+    resueltos = pd.Series(np.where(pd.isna(resueltos), nombres, resueltos))
+    return list(resueltos.drop_duplicates())
+
+
+def actualizar_diccionario(previo: pd.DataFrame, nombres: list[str]) -> pd.DataFrame:
+    """Agrega al final, con ids consecutivos, los nombres que todavía no tienen id."""
+    ya = set(previo["equipo"])
+    nuevos = [n for n in nombres if n not in ya]
+    desde = int(previo["team_id"].max()) + 1 if len(previo) else 1
+    agregados = pd.DataFrame({"team_id": range(desde, desde + len(nuevos)), "equipo": nuevos})
+    return pd.concat([previo, agregados], ignore_index=True)
+
+
+def leer_diccionario(ruta: Path = RUTA_IDS) -> pd.DataFrame:
+    if not ruta.exists():
+        return pd.DataFrame({"team_id": pd.Series(dtype="int32"), "equipo": pd.Series(dtype="str")})
+    return pd.read_csv(ruta, dtype={"team_id": "int32", "equipo": "str"})
+
+
+def cargar_ids(ruta: Path = RUTA_IDS, mapa: pd.Series | None = None) -> pd.Series:
+    """
+    Serie nombre -> team_id para buscar: los canónicos del diccionario más cada alias
+    apuntando al id de su canónico.
+    """
+    dic = leer_diccionario(ruta)
+    mapa = cargar_indice_alias(RUTA_ALIAS) if mapa is None else mapa
+    ids = pd.Series(dic["team_id"].to_numpy(), index=dic["equipo"].to_numpy())
+    por_alias = ids.reindex(mapa.to_numpy())
+    por_alias.index = mapa.index
+    por_alias = por_alias.dropna().astype("int32")
+    busqueda = pd.concat([ids, por_alias[~por_alias.index.isin(ids.index)]])
+    return busqueda.astype("int32")
+
+
+def asignar_ids(df: pd.DataFrame, ids: pd.Series) -> pd.DataFrame:
+    """
+    Agrega (o recalcula) equipo_local_id / equipo_visitante_id como Int32.
+    Busca cada nombre distinto una vez y expande por los códigos del factorize.
+    Sin diccionario (equipos_ids.csv vacío o inexistente) los ids quedan todos en <NA>.
+    """
+    df = df.copy()
+    valores_ids = ids.to_numpy()
+    for col, col_id in COLUMNAS_ID.items():
+        codigos, equipos = pd.factorize(df[col], use_na_sentinel=False)
+        posicion = ids.index.get_indexer(equipos)[codigos]
+        encontrado = posicion >= 0
+        valores = pd.array(np.zeros(len(df), dtype="int32"), dtype="Int32")
+        valores[encontrado] = valores_ids[posicion[encontrado]]
+        valores[~encontrado] = pd.NA
+        df[col_id] = pd.Series(valores, index=df.index)
+    return df
+
+
+def main():
+    ref = pd.read_csv(RUTA_REF, dtype=str)
+    previo = leer_diccionario()
+    dic = actualizar_diccionario(previo, canonicos(ref, cargar_indice_alias(RUTA_ALIAS)))
+
+    RUTA_IDS.parent.mkdir(parents=True, exist_ok=True)
+    dic.to_csv(RUTA_IDS, index=False, encoding="utf-8")
+    print(f"OK -> {RUTA_IDS} | equipos={len(dic)} | agregados={len(dic) - len(previo)}")
+
+
+if __name__ == "__main__":
+    main()
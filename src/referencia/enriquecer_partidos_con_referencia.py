@@ -1,10 +1,15 @@
+import sys
 from pathlib import Path
+import numpy as np
 import pandas as pd
 
-RUTA_PARTIDOS = Path("datos/procesados/partidos_rsssf1_validos_normalizado.csv")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # src/, para importar almacen
+from almacen import escribir_capa, leer_capa
+
+RUTA_PARTIDOS = Path("datos/procesados/partidos_rsssf1_validos_normalizado.parquet")
 RUTA_REF = Path("datos/referencias/equipos_referencia.csv")
 
-RUTA_SALIDA = Path("datos/procesados/partidos_rsssf1_enriquecido.csv")
+RUTA_SALIDA = Path("datos/procesados/partidos_rsssf1_enriquecido.parquet")
 RUTA_REPORTE_FALTANTES = Path("reportes/referencias/equipos_sin_match.csv")
 
 
@@ -14,20 +19,43 @@ def normalizar_columnas(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def _rellenar_si_vacio(serie_base: pd.Series, serie_nueva: pd.Series) -> pd.Series:
+# columna a completar -> (lado del partido, atributo de la tabla maestra).
+# Estadio y ciudad sede se aproximan con los del local.
+RELLENOS = {
+    "pais_local": ("local", "pais"),
+    "pais_visitante": ("visitante", "pais"),
+    "estadio": ("local", "estadio_principal"),
+    "ciudad_sede": ("local", "ciudad"),
+}
+
+
+def _vacios(serie: pd.Series) -> np.ndarray:
+    """Máscara de NaN / "" / solo espacios. Para categóricas se evalúa una vez por categoría."""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        codigos = serie.cat.codes.to_numpy()
+        por_categoria = serie.cat.categories.astype(str).str.strip() == ""
+        return np.append(np.asarray(por_categoria), True)[codigos]
+    return np.asarray(serie.isna() | (serie.astype(str).str.strip() == ""))
+
+
+def _rellenar_si_vacio(serie_base: pd.Series, valores_nuevos: np.ndarray) -> pd.Series:
     """
     Rellena base con nueva SOLO cuando base está vacío/NaN.
     Considera "" como vacío.
     """
-    base = serie_base.astype(object).copy()
-    vacio = base.isna() | (base.astype(str).str.strip() == "")
-    base.loc[vacio] = serie_nueva.loc[vacio]
-    return base
+    base = serie_base.to_numpy(dtype=object)
+    return pd.Series(np.where(_vacios(serie_base), valores_nuevos, base), index=serie_base.index, dtype=object)
 
 
-def main():
-    df = pd.read_csv(RUTA_PARTIDOS)
-    ref = pd.read_csv(RUTA_REF)
+def enriquecer(df: pd.DataFrame, ref: pd.DataFrame) -> tuple[pd.DataFrame, list[str]]:
+    """
+    Completa país/ciudad/estadio desde la tabla maestra y escribe el reporte de equipos
+    sin match. Devuelve (df, equipos sin match).
+
+    Un solo join por lado: cada equipo se resuelve a su posición entera en la tabla
+    maestra (-1 = sin match) y cada atributo es un take sobre esas posiciones.
+    """
+    df = df.copy()
 
     # normalizar columnas referencia
     ref = normalizar_columnas(ref)
@@ -40,38 +68,49 @@ def main():
     df["equipo_local"] = df["equipo_local"].astype(str).str.strip()
     df["equipo_visitante"] = df["equipo_visitante"].astype(str).str.strip()
     ref["equipo"] = ref["equipo"].astype(str).str.strip()
+    ref = ref.drop_duplicates(subset=["equipo"], keep="last")  # como el dict(zip(...)) de antes
+
+    # join por lado: posición en ref de cada equipo (-1 = sin match), buscando cada
+    # nombre distinto una vez y expandiendo por los códigos del factorize
+    claves = pd.Index(ref["equipo"])
+    posiciones = {}
+    for lado in ("local", "visitante"):
+        codigos, equipos = pd.factorize(df[f"equipo_{lado}"], use_na_sentinel=False)
+        posiciones[lado] = claves.get_indexer(equipos)[codigos]
 
-    # armamos mapas rápidos
-    mapa_pais = dict(zip(ref["equipo"], ref["pais"]))
-    mapa_ciudad = dict(zip(ref["equipo"], ref["ciudad"]))
-    mapa_estadio = dict(zip(ref["equipo"], ref["estadio_principal"]))
+    # la posición -1 cae en el NaN agregado al final de cada atributo
+    atributos = {a: np.append(ref[a].to_numpy(dtype=object), np.nan) for _, a in RELLENOS.values()}
 
     # si no existían, las creamos
-    for col in ["pais_local", "pais_visitante", "ciudad_sede", "estadio"]:
+    for col in RELLENOS:
         if col not in df.columns:
             df[col] = ""
 
-    # completar país local/visitante SOLO si está vacío
-    df["pais_local"] = _rellenar_si_vacio(df["pais_local"], df["equipo_local"].map(mapa_pais))
-    df["pais_visitante"] = _rellenar_si_vacio(df["pais_visitante"], df["equipo_visitante"].map(mapa_pais))
-
-    # completar estadio/ciudad sede aproximada desde el local (SOLO si está vacío)
-    df["estadio"] = _rellenar_si_vacio(df["estadio"], df["equipo_local"].map(mapa_estadio))
-    df["ciudad_sede"] = _rellenar_si_vacio(df["ciudad_sede"], df["equipo_local"].map(mapa_ciudad))
+    # completar SOLO si está vacío
+    for col, (lado, atributo) in RELLENOS.items():
+        df[col] = _rellenar_si_vacio(df[col], atributos[atributo][posiciones[lado]])
 
     # (opcional) también país_sede si existe
     if "pais_sede" in df.columns:
-        df["pais_sede"] = _rellenar_si_vacio(df["pais_sede"], df["pais_local"])
+        df["pais_sede"] = _rellenar_si_vacio(df["pais_sede"], df["pais_local"].to_numpy())
 
-    # reporte de equipos sin match en referencia
-    equipos = sorted(set(pd.concat([df["equipo_local"], df["equipo_visitante"]]).dropna().astype(str)))
-    sin_match = [e for e in equipos if e not in mapa_pais]
+    # reporte de equipos sin match en referencia, del mismo join
+    sin_match = sorted(set(df.loc[posiciones["local"] < 0, "equipo_local"])
+                       | set(df.loc[posiciones["visitante"] < 0, "equipo_visitante"]))
 
     RUTA_REPORTE_FALTANTES.parent.mkdir(parents=True, exist_ok=True)
     pd.DataFrame({"equipo_sin_match": sin_match}).to_csv(RUTA_REPORTE_FALTANTES, index=False, encoding="utf-8")
 
-    RUTA_SALIDA.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(RUTA_SALIDA, index=False, encoding="utf-8")
+    return df, sin_match
+
+
+def main():
+    df = leer_capa(RUTA_PARTIDOS)
+    ref = pd.read_csv(RUTA_REF)
+
+    df, sin_match = enriquecer(df, ref)
+
+    escribir_capa(df, RUTA_SALIDA)
 
     print(f"OK -> {RUTA_SALIDA} | filas={len(df)} | equipos_sin_match={len(sin_match)}")
     print(f"Reporte -> {RUTA_REPORTE_FALTANTES}")
@@ -1,39 +1,146 @@
+"""
+generar_equipos_unicos.py
+=========================
+Agrega a equipos_referencia.csv los equipos de la capa validada que todavía no tiene
+(con los metadatos vacíos, para completar a mano). Nunca pisa lo que ya completaste.
+
+    python src/referencia/generar_equipos_unicos.py
+
+Incremental:
+  - de la capa solo se leen equipo_local/equipo_visitante, como diccionario de Parquet:
+    los nombres distintos salen del diccionario de cada row group, sin materializar
+    un string por fila;
+  - los equipos ya conocidos viven en un índice ordenado (datos/cache/equipos_unicos.parquet)
+    y los nuevos se buscan con searchsorted; el índice se reconstruye desde el CSV solo
+    si el CSV cambió por fuera de este script;
+  - los nuevos se agregan al final del CSV en modo append, ordenados: las filas existentes
+    no se reescriben y el diff de git es solo lo agregado;
+  - si ni la capa ni el CSV cambiaron desde la última corrida, no hace nada.
+"""
+
+import csv
+import hashlib
+import os
+import sys
 from pathlib import Path
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 
-RUTA_DATOS = Path("datos/procesados/partidos_rsssf1_validos.csv")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # src/, para importar almacen
+from almacen import ruta_csv
+
+RUTA_DATOS = Path("datos/procesados/partidos_rsssf1_validos.parquet")
 RUTA_SALIDA = Path("datos/referencias/equipos_referencia.csv")
+RUTA_INDICE = Path("datos/cache/equipos_unicos.parquet")
+
+COLUMNAS_REF = ["equipo", "pais", "ciudad", "estadio_principal", "fuente_referencia", "notas"]
+COLUMNAS_EQUIPO = ["equipo_local", "equipo_visitante"]
 
-def main():
-    df = pd.read_csv(RUTA_DATOS)
 
-    equipos = pd.concat([df["equipo_local"], df["equipo_visitante"]]).dropna().unique()
-    equipos = sorted(set(e.strip() for e in equipos if str(e).strip()))
+def _hash_archivo(ruta: Path) -> str:
+    return hashlib.sha256(ruta.read_bytes()).hexdigest() if ruta.exists() else "-"
 
-    # si ya existe, no pisamos lo que completaste
-    if RUTA_SALIDA.exists():
-        ref = pd.read_csv(RUTA_SALIDA)
-        ya = set(ref["equipo"].astype(str))
+
+def huella_entrada(ruta: Path) -> str:
+    # la capa puede ser grande: alcanza con tamaño + mtime para saber si se reescribió
+    st = ruta.stat()
+    return f"{ruta}:{st.st_size}:{st.st_mtime_ns}"
+
+
+def equipos_de_capa(ruta: Path) -> np.ndarray:
+    """Nombres de equipo distintos (strip, sin vacíos), ordenados, leyendo solo las columnas de equipos."""
+    if ruta.exists():
+        archivo = pq.ParquetFile(ruta, memory_map=True, read_dictionary=COLUMNAS_EQUIPO)
+        vistos = set()
+        for lote in archivo.iter_batches(columns=COLUMNAS_EQUIPO):
+            for columna in lote.columns:
+                if pa.types.is_dictionary(columna.type):
+                    columna = columna.dictionary
+                vistos.update(columna.drop_null().to_pylist())
     else:
-        ref = pd.DataFrame(columns=["equipo","pais","ciudad","estadio_principal","fuente_referencia","notas"])
-        ya = set()
+        df = pd.read_csv(ruta_csv(ruta), usecols=COLUMNAS_EQUIPO, dtype=str)
+        vistos = set(pd.concat([df[c] for c in COLUMNAS_EQUIPO]).dropna().unique())
+
+    limpios = {str(e).strip() for e in vistos}
+    limpios.discard("")
+    return np.array(sorted(limpios), dtype=object)
+
+
+def cargar_indice(ruta_indice: Path, ruta_ref: Path) -> tuple[np.ndarray, dict[str, str]]:
+    """
+    Índice ordenado de equipos conocidos y su metadata. Si no existe o el CSV de
+    referencia cambió desde que se guardó, se reconstruye leyendo solo la columna `equipo`.
+    """
+    hash_ref = _hash_archivo(ruta_ref)
+    if ruta_indice.exists():
+        tabla = pq.read_table(ruta_indice)
+        meta = {k.decode(): v.decode() for k, v in (tabla.schema.metadata or {}).items()}
+        if meta.get("ref") == hash_ref:
+            return np.array(tabla.column("equipo").to_pylist(), dtype=object), meta
 
-    faltantes = [e for e in equipos if e not in ya]
+    conocidos = []
+    if ruta_ref.exists():
+        conocidos = pd.read_csv(ruta_ref, usecols=["equipo"], dtype=str)["equipo"].dropna()
+    return np.array(sorted(set(conocidos)), dtype=object), {"ref": hash_ref}
 
-    nuevos = pd.DataFrame({
-        "equipo": faltantes,
-        "pais": "",
-        "ciudad": "",
-        "estadio_principal": "",
-        "fuente_referencia": "",
-        "notas": ""
-    })
 
-    ref_final = pd.concat([ref, nuevos], ignore_index=True)
-    RUTA_SALIDA.parent.mkdir(parents=True, exist_ok=True)
-    ref_final.to_csv(RUTA_SALIDA, index=False, encoding="utf-8")
+def guardar_indice(conocidos: np.ndarray, meta: dict[str, str], ruta: Path) -> None:
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    tabla = pa.table({"equipo": pa.array(list(conocidos), type=pa.string())})
+    tabla = tabla.replace_schema_metadata(meta)
+    tmp = ruta.with_name(f"{ruta.name}.{os.getpid()}.tmp")
+    pq.write_table(tabla, tmp)
+    tmp.replace(ruta)
 
+
+def nuevos_equipos(equipos: np.ndarray, conocidos: np.ndarray) -> np.ndarray:
+    """Los de `equipos` que no están en `conocidos` (ambos ordenados)."""
+    if len(conocidos) == 0:
+        return equipos
+    pos = np.searchsorted(conocidos, equipos)
+    pos = np.minimum(pos, len(conocidos) - 1)
+    return equipos[conocidos[pos] != equipos]
+
+
+def agregar_al_csv(ruta: Path, equipos: np.ndarray) -> None:
+    """Append de filas `equipo,,,,,` sin reescribir las existentes."""
+    nuevo = not ruta.exists()
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    if not nuevo:
+        with open(ruta, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    raise ValueError(f"{ruta} no termina en salto de línea; corregilo antes de agregar equipos")
+
+    with open(ruta, "a", newline="", encoding="utf-8") as f:
+        escritor = csv.writer(f, lineterminator="\n")
+        if nuevo:
+            escritor.writerow(COLUMNAS_REF)
+        for equipo in equipos:
+            escritor.writerow([equipo] + [""] * (len(COLUMNAS_REF) - 1))
+
+
+def main():
+    conocidos, meta = cargar_indice(RUTA_INDICE, RUTA_SALIDA)
+    entrada = huella_entrada(RUTA_DATOS if RUTA_DATOS.exists() else ruta_csv(RUTA_DATOS))
+    if meta.get("entrada") == entrada:
+        print(f"SIN CAMBIOS -> {RUTA_SALIDA} | equipos_conocidos={len(conocidos)}")
+        return
+
+    equipos = equipos_de_capa(RUTA_DATOS)
+    faltantes = nuevos_equipos(equipos, conocidos)
+
+    if len(faltantes):
+        agregar_al_csv(RUTA_SALIDA, faltantes)
+        conocidos = np.array(sorted(set(conocidos) | set(faltantes)), dtype=object)
+
+    guardar_indice(conocidos, {"ref": _hash_archivo(RUTA_SALIDA), "entrada": entrada}, RUTA_INDICE)
     print(f"OK -> {RUTA_SALIDA} | equipos_total={len(equipos)} | agregados={len(faltantes)}")
 
+
 if __name__ == "__main__":
     main()
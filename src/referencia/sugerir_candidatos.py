@@ -0,0 +1,106 @@
+"""
+sugerir_candidatos.py
+=====================
+Sugerencias para curar a mano los equipos sin match. NO modifica nada: la normalización
+sigue siendo la tabla explícita de alias (ver docs/decisiones.md, punto 2).
+
+    python src/referencia/sugerir_candidatos.py            # top 5 por nombre
+    python src/referencia/sugerir_candidatos.py --k 10
+
+Para cada nombre de reportes/referencias/equipos_sin_match.csv y alias_no_aplicados.csv
+que no es ya un canónico de datos/referencias/equipos_ids.csv, rankea los canónicos
+más parecidos y escribe <reporte>_candidatos.csv al lado (equipo, rango, candidato, puntaje).
+
+Parecido = coeficiente de Dice sobre trigramas de caracteres (sin acentos ni mayúsculas).
+Los canónicos se indexan en un índice invertido trigrama -> posiciones: cada consulta
+solo recorre las listas de sus propios trigramas, no la tabla entera. El ranking es
+determinista: puntaje descendente y, a igual puntaje, orden alfabético.
+"""
+
+import argparse
+import sys
+import unicodedata
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # src/, para importar referencia.*
+from referencia.alias_robusto import RUTA_REPORTE as RUTA_ALIAS_NO_APLICADOS, norm
+from referencia.diccionario_equipos import RUTA_IDS, leer_diccionario
+from referencia.enriquecer_partidos_con_referencia import RUTA_REPORTE_FALTANTES
+
+REPORTES = [RUTA_REPORTE_FALTANTES, RUTA_ALIAS_NO_APLICADOS]
+PUNTAJE_MINIMO = 0.3
+
+
+def ruta_candidatos(ruta_reporte: Path) -> Path:
+    return ruta_reporte.with_name(f"{ruta_reporte.stem}_candidatos.csv")
+
+
+def trigramas(nombre: str) -> set[str]:
+    s = unicodedata.normalize("NFKD", norm(nombre).lower())
+    s = "".join(c for c in s if not unicodedata.combining(c))
+    s = f"  {s} "
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+
+def construir_indice(nombres: list[str]) -> tuple[dict[str, np.ndarray], np.ndarray]:
+    """Índice invertido trigrama -> posiciones en `nombres`, y cantidad de trigramas de cada nombre."""
+    listas: dict[str, list[int]] = {}
+    tamanos = np.zeros(len(nombres), dtype=np.int32)
+    for i, nombre in enumerate(nombres):
+        grams = trigramas(nombre)
+        tamanos[i] = len(grams)
+        for g in grams:
+            listas.setdefault(g, []).append(i)
+    return {g: np.array(p, dtype=np.int32) for g, p in listas.items()}, tamanos
+
+
+def candidatos(nombre: str, indice: dict[str, np.ndarray], tamanos: np.ndarray, nombres: np.ndarray,
+               k: int = 5, minimo: float = PUNTAJE_MINIMO) -> list[tuple[str, float]]:
+    """Top-k canónicos por Dice de trigramas (solo los que comparten algún trigrama)."""
+    grams = trigramas(nombre)
+    listas = [indice[g] for g in grams if g in indice]
+    if not listas:
+        return []
+    posiciones, comunes = np.unique(np.concatenate(listas), return_counts=True)
+    puntajes = 2 * comunes / (len(grams) + tamanos[posiciones])
+    # puntaje descendente; empate -> alfabético (nombres ya viene ordenado)
+    orden = np.lexsort((posiciones, -puntajes))
+    orden = orden[puntajes[orden] >= minimo][:k]
+    return [(nombres[posiciones[j]], round(float(puntajes[j]), 3)) for j in orden]
+
+
+def sugerir(equipos: list[str], canonicos: list[str], k: int = 5) -> pd.DataFrame:
+    nombres = np.array(sorted(set(canonicos)), dtype=object)
+    indice, tamanos = construir_indice(list(nombres))
+    filas = []
+    for equipo in equipos:
+        for rango, (candidato, puntaje) in enumerate(candidatos(equipo, indice, tamanos, nombres, k), start=1):
+            filas.append({"equipo": equipo, "rango": rango, "candidato": candidato, "puntaje": puntaje})
+    return pd.DataFrame(filas, columns=["equipo", "rango", "candidato", "puntaje"])
+
+
+def main(argv: list[str] | None = None):
+    ap = argparse.ArgumentParser(description="Sugiere canónicos para los equipos sin match (no aplica nada)")
+    ap.add_argument("--k", type=int, default=5, help="candidatos por nombre")
+    args = ap.parse_args(argv)
+
+    canonicos = list(leer_diccionario(RUTA_IDS)["equipo"])
+    ya_canonicos = set(canonicos)
+
+    for reporte in REPORTES:
+        if not reporte.exists():
+            print(f"SIN REPORTE -> {reporte} (correr el pipeline primero)")
+            continue
+        equipos = pd.read_csv(reporte, dtype=str).iloc[:, 0].dropna()
+        equipos = [e for e in equipos if e not in ya_canonicos]
+
+        sugerencias = sugerir(equipos, canonicos, args.k)
+        destino = ruta_candidatos(reporte)
+        sugerencias.to_csv(destino, index=False, encoding="utf-8")
+        print(f"OK -> {destino} | equipos={len(equipos)} | sugerencias={len(sugerencias)}")
+
+
+if __name__ == "__main__":
+    main()
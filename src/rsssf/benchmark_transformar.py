@@ -0,0 +1,86 @@
+"""
+Benchmark de transformar_rsssf_a_v1: versión fila a fila (la original) vs vectorizada.
+
+Replica la capa cruda hasta --filas filas, corre ambas, verifica que produzcan los
+mismos valores y reporta tiempo y memoria de cada una.
+
+    python src/rsssf/benchmark_transformar.py --filas 2000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from transformar_rsssf_a_v1 import RUTA_ENTRADA, fase_desde_etapa, leer_capa, resultado_desde_goles, transformar
+
+
+def transformar_por_fila(df: pd.DataFrame) -> pd.DataFrame:
+    # copia de la implementación anterior a la vectorización, como referencia
+    df_v1 = pd.DataFrame()
+    df_v1["temporada"] = df["temporada"].astype("int64")
+    df_v1["competicion"] = "Copa Libertadores"
+    df_v1["fase"] = df["etapa"].apply(fase_desde_etapa)
+    df_v1["instancia"] = df["instancia"]
+    df_v1.loc[df["etapa"] == "Grupos", "instancia"] = df["grupo"]
+    df_v1["fecha"] = df["fecha"]
+    df_v1["pais_sede"] = ""
+    df_v1["ciudad_sede"] = ""
+    df_v1["estadio"] = ""
+    df_v1["equipo_local"] = df["equipo_local"]
+    df_v1["equipo_visitante"] = df["equipo_visitante"]
+    df_v1["pais_local"] = ""
+    df_v1["pais_visitante"] = ""
+    df_v1["goles_local"] = df["goles_local"].astype("int64")
+    df_v1["goles_visitante"] = df["goles_visitante"].astype("int64")
+    df_v1["resultado"] = [
+        resultado_desde_goles(gl, gv)
+        for gl, gv in zip(df_v1["goles_local"], df_v1["goles_visitante"])
+    ]
+    df_v1["fuente"] = df["fuente"]
+    df_v1["url_fuente"] = ""
+    df_v1["id_partido_fuente"] = ""
+    df_v1["observaciones"] = ""
+    df_v1.loc[df["agregado_texto"].notna(), "observaciones"] = "agregado=" + df["agregado_texto"].astype(str)
+    return df_v1
+
+
+def escalar(df: pd.DataFrame, filas: int) -> pd.DataFrame:
+    idx = np.resize(np.arange(len(df)), filas)
+    return df.iloc[idx].reset_index(drop=True)
+
+
+def medir(funcion, df: pd.DataFrame, repeticiones: int) -> tuple[float, pd.DataFrame]:
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        resultado = funcion(df)
+        mejor = min(mejor, time.perf_counter() - t0)
+    return mejor, resultado
+
+
+def main(argv: list[str] | None = None):
+    ap = argparse.ArgumentParser(description="Benchmark de la transformación a esquema v1")
+    ap.add_argument("--filas", type=int, default=2_000_000)
+    ap.add_argument("--repeticiones", type=int, default=3)
+    args = ap.parse_args(argv)
+
+    df = escalar(leer_capa(RUTA_ENTRADA), args.filas)
+    print(f"Entrada: {RUTA_ENTRADA} escalado a {len(df)} filas")
+
+    t_fila, df_fila = medir(transformar_por_fila, df, args.repeticiones)
+    t_vec, df_vec = medir(transformar, df, args.repeticiones)
+
+    # mismos valores (los tipos difieren a propósito: categóricos vs object)
+    pd.testing.assert_frame_equal(df_fila, df_vec.astype({c: object for c in df_vec.select_dtypes("category")}),
+                                  check_dtype=False)
+
+    mem_fila = df_fila.memory_usage(deep=True).sum() / 2**20
+    mem_vec = df_vec.memory_usage(deep=True).sum() / 2**20
+    print(f"fila a fila : {t_fila:7.3f} s | {mem_fila:8.1f} MiB")
+    print(f"vectorizada : {t_vec:7.3f} s | {mem_vec:8.1f} MiB")
+    print(f"speedup x{t_fila / t_vec:.1f} | memoria x{mem_fila / mem_vec:.1f} menos")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,36 @@
+import argparse
+import gzip
+import json
+import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
 
+try:
+    import lxml.html as lxml_html
+except ImportError:  # sin lxml usamos solo BeautifulSoup
+    lxml_html = None
+
 BASE_URL = "https://www.rsssf.org/sacups/"
 
 OUT_DIR = Path("libertadores_rsssf_txt")
 OUT_DIR = Path("datos/rsssf")
 
-def build_url_for_year(year: int) -> str:
+# HTML crudo de cada temporada, comprimido: permite re-extraer los .txt sin red
+CARPETA_HTML = Path("datos/rsssf_html")
+
+# ETag / Last-Modified de la última descarga de cada año (para requests condicionales)
+RUTA_METADATOS = Path("datos/cache/descargas_rsssf.json")
+
+# códigos que vale la pena reintentar
+STATUS_REINTENTABLES = {429, 500, 502, 503, 504}
+
+
+def build_url_for_year(year: int, base_url: str = BASE_URL) -> str:
     """
     Construye la URL del año usando la convención de nombres:
     - 1996–2009: copaXX.html, con XX = últimos 2 dígitos
@@ -23,22 +45,130 @@ def build_url_for_year(year: int) -> str:
     else:
         raise ValueError(f"Año fuera de rango: {year}")
 
-    return BASE_URL + filename
+    return base_url + filename
 
 
-def scrape_year(year: int):
-    url = build_url_for_year(year)
-    print(f"Descargando {year} desde {url} ...")
+class TokenBucket:
+    """
+    Rate limiter compartido entre threads: `tasa` requests por segundo en promedio,
+    con ráfagas de hasta `capacidad`. `tomar()` bloquea hasta que haya un token.
+    """
+
+    def __init__(self, tasa: float, capacidad: int = 1):
+        if tasa <= 0:
+            raise ValueError("La tasa debe ser > 0")
+        self.tasa = tasa
+        self.capacidad = max(1, capacidad)
+        self._tokens = float(self.capacidad)
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def tomar(self) -> None:
+        while True:
+            with self._lock:
+                ahora = time.monotonic()
+                self._tokens = min(self.capacidad, self._tokens + (ahora - self._ultimo) * self.tasa)
+                self._ultimo = ahora
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                espera = (1 - self._tokens) / self.tasa
+            time.sleep(espera)
+
+
+def crear_sesion(workers: int) -> requests.Session:
+    # un solo pool de conexiones keep-alive compartido por todos los threads
+    sesion = requests.Session()
+    adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, workers))
+    sesion.mount("http://", adaptador)
+    sesion.mount("https://", adaptador)
+    return sesion
+
+
+def descargar_html(url: str, sesion: requests.Session, limitador: TokenBucket | None = None,
+                   meta_previa: dict | None = None, reintentos: int = 3, backoff: float = 1.0):
+    """
+    GET con requests condicionales y reintentos con backoff exponencial.
+    Devuelve (html, meta): html es None si el servidor respondió 304 (sin cambios);
+    meta trae el ETag / Last-Modified a guardar para la próxima vez.
+    Cada intento (incluidos los reintentos) consume un token del limitador.
+    """
+    headers = {}
+    if meta_previa:
+        if meta_previa.get("etag"):
+            headers["If-None-Match"] = meta_previa["etag"]
+        if meta_previa.get("last_modified"):
+            headers["If-Modified-Since"] = meta_previa["last_modified"]
+
+    for intento in range(reintentos + 1):
+        if limitador is not None:
+            limitador.tomar()
+        try:
+            resp = sesion.get(url, headers=headers, timeout=30)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if intento == reintentos:
+                raise RuntimeError(f"Sin respuesta de {url} tras {reintentos + 1} intentos: {e}")
+            time.sleep(backoff * 2 ** intento)
+            continue
+
+        if resp.status_code in STATUS_REINTENTABLES and intento < reintentos:
+            retry_after = resp.headers.get("Retry-After", "")
+            time.sleep(float(retry_after) if retry_after.isdigit() else backoff * 2 ** intento)
+            continue
+
+        if resp.status_code == 304:
+            return None, dict(meta_previa or {})
+        if resp.status_code != 200:
+            raise RuntimeError(f"HTTP {resp.status_code} ({url})")
+
+        # RSSSF suele estar en latin-1
+        if resp.encoding is None:
+            resp.encoding = "latin-1"
+
+        meta = {
+            "url": url,
+            "etag": resp.headers.get("ETag"),
+            "last_modified": resp.headers.get("Last-Modified"),
+        }
+        return resp.text, meta
+
+
+def extraer_texto_lxml(html: str, year: int) -> str:
+    """
+    Camino rápido con lxml (parser en C). Reproduce el texto de extraer_texto_bs4:
+    <h2> con strip y sin separador, cada <pre> con sus nodos de texto unidos por "\n"
+    (los comentarios no cuentan).
+    """
+    doc = lxml_html.document_fromstring(html)
+
+    parts = []
+
+    h2 = doc.find(".//h2")
+    if h2 is not None:
+        parts.append("".join(t.strip() for t in h2.itertext() if t.strip()))
+        parts.append("")
+
+    pres = list(doc.iter("pre"))
+    if not pres:
+        raise RuntimeError(f"No encontré ningún <pre> para {year}")
 
-    resp = requests.get(url, timeout=30)
-    if resp.status_code != 200:
-        raise RuntimeError(f"HTTP {resp.status_code} para {year} ({url})")
+    for pre in pres:
+        parts.append("\n".join(pre.itertext()))
+
+    return "\n".join(parts)
+
+
+def extraer_texto(html: str, year: int) -> str:
+    if lxml_html is not None:
+        try:
+            return extraer_texto_lxml(html, year)
+        except ValueError:
+            pass  # ej: declaración XML con encoding en un str; probamos con BeautifulSoup
+    return extraer_texto_bs4(html, year)
 
-    # RSSSF suele estar en latin-1
-    if resp.encoding is None:
-        resp.encoding = "latin-1"
 
-    soup = BeautifulSoup(resp.text, "html.parser")
+def extraer_texto_bs4(html: str, year: int) -> str:
+    soup = BeautifulSoup(html, "html.parser")
 
     parts = []
 
@@ -51,26 +181,134 @@ def scrape_year(year: int):
     # Uno o varios bloques <pre> (partidos, tablas, etc.)
     pres = soup.find_all("pre")
     if not pres:
-        raise RuntimeError(f"No encontré ningún <pre> para {year} ({url})")
+        raise RuntimeError(f"No encontré ningún <pre> para {year}")
 
     for pre in pres:
         parts.append(pre.get_text("\n", strip=False))
 
-    text = "\n".join(parts)
+    return "\n".join(parts)
+
+
+def ruta_html(year: int, carpeta: Path = CARPETA_HTML) -> Path:
+    return carpeta / f"{year}.html.gz"
+
 
+def guardar_html(year: int, html: str, carpeta: Path = CARPETA_HTML) -> Path:
+    ruta = ruta_html(year, carpeta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    # mtime=0: mismo HTML -> mismos bytes, para que git no vea cambios falsos
+    with gzip.GzipFile(ruta, "wb", mtime=0) as f:
+        f.write(html.encode("utf-8"))
+    return ruta
+
+
+def cargar_html(year: int, carpeta: Path = CARPETA_HTML) -> str | None:
+    ruta = ruta_html(year, carpeta)
+    if not ruta.exists():
+        return None
+    with gzip.open(ruta, "rb") as f:
+        return f.read().decode("utf-8")
+
+
+def escribir_txt(year: int, html: str) -> Path:
+    text = extraer_texto(html, year)
     out_path = OUT_DIR / f"{year}.txt"
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
     out_path.write_text(text, encoding="utf-8")
     print(f"OK -> {out_path} ({len(text)} caracteres)")
+    return out_path
 
 
-def main():
-    for year in range(1996, 2025):
-        try:
-            scrape_year(year)
-            # pequeña pausa para no matar al server
-            time.sleep(1)
-        except Exception as e:
-            print(f"ERROR en {year}: {e}")
+def reconstruir_desde_html(years, carpeta: Path = CARPETA_HTML) -> int:
+    """Re-extrae datos/rsssf/<año>.txt desde el HTML guardado, sin red. Devuelve cuántos escribió."""
+    escritos = 0
+    for year in years:
+        html = cargar_html(year, carpeta)
+        if html is None:
+            print(f"SIN HTML -> {ruta_html(year, carpeta)} (correr una descarga primero)")
+            continue
+        escribir_txt(year, html)
+        escritos += 1
+    return escritos
+
+
+def scrape_year(year: int, sesion: requests.Session | None = None, limitador: TokenBucket | None = None,
+                meta_previa: dict | None = None, base_url: str = BASE_URL, reintentos: int = 3,
+                backoff: float = 1.0) -> dict | None:
+    """
+    Descarga el año, guarda el HTML crudo en CARPETA_HTML y escribe datos/rsssf/<año>.txt.
+    Devuelve la meta HTTP a guardar, o la previa sin cambios si el servidor respondió 304.
+    """
+    url = build_url_for_year(year, base_url)
+    out_path = OUT_DIR / f"{year}.txt"
+    print(f"Descargando {year} desde {url} ...")
+
+    # sin el .txt y el HTML locales no tiene sentido preguntar "¿cambió?"
+    if not out_path.exists() or not ruta_html(year).exists():
+        meta_previa = None
+
+    html, meta = descargar_html(url, sesion or requests.Session(), limitador, meta_previa, reintentos, backoff)
+    if html is None:
+        print(f"SIN CAMBIOS -> {out_path} (304)")
+        return meta
+
+    guardar_html(year, html)
+    escribir_txt(year, html)
+    return meta
+
+
+def cargar_metadatos(ruta: Path = RUTA_METADATOS) -> dict:
+    if not ruta.exists():
+        return {}
+    return json.loads(ruta.read_text(encoding="utf-8"))
+
+
+def guardar_metadatos(metadatos: dict, ruta: Path = RUTA_METADATOS) -> None:
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    tmp = ruta.with_name(f"{ruta.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(metadatos, indent=2, sort_keys=True), encoding="utf-8")
+    tmp.replace(ruta)
+
+
+def main(argv: list[str] | None = None):
+    ap = argparse.ArgumentParser(description="Descarga las temporadas de RSSSF a datos/rsssf/*.txt")
+    ap.add_argument("--workers", type=int, default=4, help="descargas concurrentes")
+    ap.add_argument("--tasa", type=float, default=1.0, help="requests por segundo (promedio) al servidor")
+    ap.add_argument("--rafaga", type=int, default=2, help="requests que se pueden hacer seguidas")
+    ap.add_argument("--reintentos", type=int, default=3)
+    ap.add_argument("--base-url", default=BASE_URL, help="servidor alternativo (ej: uno local para pruebas)")
+    ap.add_argument("--forzar", action="store_true", help="descarga todo sin requests condicionales")
+    ap.add_argument("--offline", action="store_true",
+                    help=f"no descarga: re-extrae los .txt desde el HTML guardado en {CARPETA_HTML}")
+    ap.add_argument("--desde", type=int, default=1996)
+    ap.add_argument("--hasta", type=int, default=2024)
+    args = ap.parse_args(argv)
+
+    if args.offline:
+        escritos = reconstruir_desde_html(range(args.desde, args.hasta + 1))
+        print(f"Reconstruidos {escritos} archivos desde {CARPETA_HTML}")
+        return
+
+    metadatos = cargar_metadatos()
+    limitador = TokenBucket(args.tasa, args.rafaga)
+    sesion = crear_sesion(args.workers)
+
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futuros = {
+            pool.submit(scrape_year, year, sesion, limitador, None if args.forzar else metadatos.get(str(year)),
+                        args.base_url, args.reintentos): year
+            for year in range(args.desde, args.hasta + 1)
+        }
+        for futuro in as_completed(futuros):
+            year = futuros[futuro]
+            try:
+                meta = futuro.result()
+                if meta:
+                    metadatos[str(year)] = meta
+            except Exception as e:
+                print(f"ERROR en {year}: {e}")
+
+    guardar_metadatos(metadatos)
 
 
 if __name__ == "__main__":
@@ -1,9 +1,26 @@
 from __future__ import annotations
 
+import argparse
+import hashlib
+import json
+import os
+import pickle
 import re
-from dataclasses import dataclass, asdict
+import sys
+import time
+from array import array
+from collections import Counter, defaultdict
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from dataclasses import dataclass, fields
 from pathlib import Path
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # src/, para importar almacen
+from almacen import EscritorCapa
 
 
 MESES = {
@@ -33,6 +50,18 @@ RE_PARTIDO_GRUPOS_ALT = re.compile(
     r"(?P<goles_local>\d+)\-(?P<goles_visitante>\d+)[a-zA-Z*]*\s*$"
 )
 
+# Partidos de grupos con guion pegado a uno o ambos equipos (1997, 1998 y sueltos en otros años):
+# "Feb 19: Guaraní-Cerro Porteño                 1-0"
+# "May 15: Defensor Sporting- Cerro Porteño      0-1"
+# "Apr  20:Colo Colo - Cerro Porteño             2-3"
+# Se prueba DESPUÉS del estándar: con nombres que llevan guion ("Estudiantes-LP - X")
+# el corte en el primer guion sería incorrecto.
+RE_PARTIDO_GRUPOS_PEGADO = re.compile(
+    r"^(?P<mes>[A-Za-z]{3})\s+(?P<dia>\d{1,2})\:\s*"
+    r"(?P<local>.*?\S)\s*\-\s*(?P<visitante>\S.*?)\s+"
+    r"(?P<goles_local>\d+)\-(?P<goles_visitante>\d+)[a-zA-Z*]*\s*$"
+)
+
 # "Group 5", "Group A", "Group 5 [Argentina, Venezuela]"
 RE_GRUPO = re.compile(r"^Group\s+(?P<grupo>\w+).*$")
 
@@ -60,10 +89,110 @@ RE_PAIS_3 = re.compile(r"^[A-Z][a-z]{2}$")
 # Marcador: "1-0" o "2-4p"
 RE_MARCADOR = re.compile(r"^\d+\-\d+(p)?$")
 
+# Variantes de guion que normalizamos a "-" antes de cualquier match:
+# \x96 = en-dash cp1252, u2013 = en-dash unicode, u2014 = em-dash
+GUIONES = ("\x96", "–", "—")
+
+
+# ====== CLASIFICADOR DE LÍNEAS ======
+
+def _combinar_reglas(reglas: list[tuple[str, re.Pattern]]) -> re.Pattern:
+    """
+    Une las regex de cada regla en una sola alternancia con un grupo nombrado por regla.
+    La alternancia respeta el orden de la lista, así que la prioridad entre reglas es la
+    misma que aplicarlas una por una. Los grupos internos se prefijan con el nombre de la
+    regla (ej: "fase_fechas_mes") para que no choquen entre sí.
+    """
+    partes = []
+    for nombre, regex in reglas:
+        patron = re.sub(r"\(\?P<(\w+)>", lambda m: f"(?P<{nombre}_{m.group(1)}>", regex.pattern)
+        if regex.flags & re.IGNORECASE:
+            patron = f"(?i:{patron})"
+        partes.append(f"(?P<{nombre}>{patron})")
+    return re.compile("|".join(partes))
+
+
+REGLAS_ENCABEZADOS = [
+    ("tabla", RE_TABLA),
+    ("grupo", RE_GRUPO),
+    ("fase_fechas", RE_FASE_CON_FECHAS),
+    ("fase_sola", RE_FASE_SOLA),
+    ("solo_fechas", RE_SOLO_FECHAS),
+]
+
+# Una regex combinada por formato de archivo; el orden de la lista es la prioridad.
+# - estandar: "A - B". El estándar va primero; el pegado cubre líneas sueltas sin espacios
+#   y el ALT las sueltas sin guion. 2011/2012 caen acá: su separador es un guion cp1252
+#   (U+0096) que se normaliza a "-" antes de detectar.
+# - sin_espacios (1997/1998): "A-B". El ALT no se prueba: ahí solo daba falsos positivos.
+RE_LINEA_POR_FORMATO = {
+    "estandar": _combinar_reglas(REGLAS_ENCABEZADOS + [
+        ("partido", RE_PARTIDO_GRUPOS),
+        ("partido_pegado", RE_PARTIDO_GRUPOS_PEGADO),
+        ("partido_alt", RE_PARTIDO_GRUPOS_ALT),
+    ]),
+    "sin_espacios": _combinar_reglas(REGLAS_ENCABEZADOS + [
+        ("partido", RE_PARTIDO_GRUPOS),
+        ("partido_pegado", RE_PARTIDO_GRUPOS_PEGADO),
+    ]),
+}
+RE_LINEA = RE_LINEA_POR_FORMATO["estandar"]
+
+# Cuántas líneas de partido de grupos mirar para decidir el formato del archivo
+LINEAS_SNIFF = 20
+
+RE_INICIO_FECHA = re.compile(r"^[A-Za-z]{3}\s+\d{1,2}\s*\:")
+
+
+def detectar_formato(lineas: list[str]) -> str:
+    """
+    Mira las primeras LINEAS_SNIFF líneas con fecha ("Mar 13: ...") y vota el formato
+    de partidos de grupos del archivo. Corre una sola vez por archivo; ante empate o
+    sin partidos de grupos, "estandar".
+    """
+    votos = Counter()
+    vistas = 0
+    for linea in lineas:
+        s = linea.strip()
+        if not RE_INICIO_FECHA.match(s):
+            continue
+        if RE_PARTIDO_GRUPOS.match(s):
+            votos["estandar"] += 1
+        elif RE_PARTIDO_GRUPOS_PEGADO.match(s):
+            votos["sin_espacios"] += 1
+        vistas += 1
+        if vistas >= LINEAS_SNIFF:
+            break
+    if not votos:
+        return "estandar"
+    formato, n = votos.most_common(1)[0]
+    return formato if n > votos["estandar"] else "estandar"
+
+
+# Iniciales posibles de RE_FASE_SOLA (con IGNORECASE, "ſ" también matchea "s")
+_INICIALES_FASE = frozenset("sqfSQFſ")
+
+
+def _puede_matchear_regla(s: str) -> bool:
+    """
+    Prefiltro barato sobre los primeros caracteres de una línea ya stripeada.
+    Devuelve False solo si es seguro que ninguna regla de RE_LINEA puede matchear;
+    en ese caso la línea va directo al intento de serie (o se descarta).
+    """
+    c = s[0]
+    return (
+        c.isdigit()                                 # tabla de posiciones
+        or c == "("                                 # "(Apr 16 & 22)"
+        or s.endswith(")")                          # "Second Round (May 1 & 8)"
+        or c in _INICIALES_FASE                     # "Second Round", "Final", ...
+        or s.startswith("Group")
+        or (s[3:4].isspace() and s[:3].isalpha())   # "Mar 13: ..."
+    )
+
 
 # ====== DATA ======
 
-@dataclass
+@dataclass(slots=True)
 class PartidoCrudo:
     temporada: int
     etapa: str | None           # ej: "Second Round"
@@ -80,6 +209,157 @@ class PartidoCrudo:
     linea_partido: str
 
 
+# orden de columnas del CSV crudo
+COLUMNAS_CRUDO = [f.name for f in fields(PartidoCrudo)]
+
+@dataclass(slots=True)
+class GolCrudo:
+    temporada: int
+    clave_partido: str          # temporada|fecha|equipo_local|equipo_visitante (nombres RSSSF)
+    lado: str                   # "local"/"visitante": equipo al que se le cuenta el gol
+    jugador: str
+    minuto: int | None          # None si RSSSF no trae minuto (ej: "Rivera(2)")
+    minuto_adicional: int | None  # ej: 1 para "90+1"
+    penal: bool
+    en_contra: bool
+    archivo_fuente: str
+
+
+COLUMNAS_GOLES = [f.name for f in fields(GolCrudo)]
+
+COLUMNAS_ENTERAS = ("temporada", "goles_local", "goles_visitante")
+COLUMNAS_CATEGORICAS = ("etapa", "grupo", "fuente", "archivo_fuente")
+
+
+def _esquema_arrow(columnas: list[str], tipos: dict[str, pa.DataType]) -> pa.Schema:
+    """Esquema Arrow explícito de una capa cruda: texto nullable salvo las columnas de `tipos`."""
+    return pa.schema([pa.field(c, tipos.get(c, pa.large_string()), nullable=True) for c in columnas])
+
+
+_CATEGORICA = pa.dictionary(pa.int32(), pa.large_string())
+
+# esquemas de las capas crudas escritas en streaming: no se infieren del primer lote
+# (desde 2000 agregado_texto viene todo nulo en una temporada sin series)
+ESQUEMA_CRUDO = _esquema_arrow(COLUMNAS_CRUDO, {
+    **{c: pa.int64() for c in COLUMNAS_ENTERAS},
+    **{c: _CATEGORICA for c in COLUMNAS_CATEGORICAS},
+})
+ESQUEMA_GOLES = _esquema_arrow(COLUMNAS_GOLES, {
+    "temporada": pa.int64(), "minuto": pa.int64(), "minuto_adicional": pa.int64(),
+    "penal": pa.bool_(), "en_contra": pa.bool_(), "lado": _CATEGORICA, "archivo_fuente": _CATEGORICA,
+})
+
+
+class _ColumnaCategorica:
+    """Strings internados: cada valor distinto se guarda una vez y la columna es un array de códigos."""
+
+    __slots__ = ("categorias", "codigos", "_codigo_por_valor")
+
+    def __init__(self):
+        self.categorias: list[str] = []
+        self.codigos = array("i")
+        self._codigo_por_valor: dict[str, int] = {}
+
+    def _codigo(self, valor: str) -> int:
+        codigo = self._codigo_por_valor.get(valor)
+        if codigo is None:
+            codigo = len(self.categorias)
+            self._codigo_por_valor[valor] = codigo
+            self.categorias.append(valor)
+        return codigo
+
+    def agregar(self, valor: str | None) -> None:
+        self.codigos.append(-1 if valor is None else self._codigo(valor))
+
+    # misma interfaz que array/list, para que ColumnasPartidos trate todas las columnas igual
+    append = agregar
+
+    def extender(self, otra: "_ColumnaCategorica") -> None:
+        """Agrega los códigos de `otra` traducidos a las categorías de esta (el -1 queda -1)."""
+        traduccion = np.array([self._codigo(v) for v in otra.categorias] + [-1], dtype=np.intc)
+        self.codigos.frombytes(traduccion[np.frombuffer(otra.codigos, dtype=np.intc)].tobytes())
+
+    def __getitem__(self, i: int) -> str | None:
+        codigo = self.codigos[i]
+        return None if codigo < 0 else self.categorias[codigo]
+
+    def __iter__(self) -> Iterator[str | None]:
+        # el código -1 cae en el None agregado al final
+        tabla = self.categorias + [None]
+        return (tabla[c] for c in self.codigos)
+
+    def a_categorical(self) -> pd.Categorical:
+        # copia para no dejar el array exportando su buffer (no se podría seguir agregando)
+        codigos = np.frombuffer(self.codigos, dtype=np.intc).copy()
+        return pd.Categorical.from_codes(codigos, categories=self.categorias)
+
+
+class ColumnasPartidos:
+    """
+    Acumulador columnar de partidos: arrays tipados para enteros, códigos internados
+    para etapa/grupo/fuente/archivo_fuente y listas para el resto. El parser agrega cada
+    fila con agregar_valores (los grupos del match van directo a las columnas, sin un
+    objeto por fila); `a_dataframe` arma el DataFrame directo desde las columnas.
+    Indexar o iterar devuelve PartidoCrudo como vista para quien necesite la API de filas.
+    """
+
+    def __init__(self, partidos: Iterable[PartidoCrudo] = ()):
+        self._columnas: dict[str, object] = {}
+        for c in COLUMNAS_CRUDO:
+            if c in COLUMNAS_ENTERAS:
+                self._columnas[c] = array("q")
+            elif c in COLUMNAS_CATEGORICAS:
+                self._columnas[c] = _ColumnaCategorica()
+            else:
+                self._columnas[c] = []
+        self._largo = 0
+        self.extend(partidos)
+
+    def agregar_valores(self, *valores) -> None:
+        """Una fila, con los valores en el orden de COLUMNAS_CRUDO."""
+        for col, valor in zip(self._columnas.values(), valores):
+            col.append(valor)
+        self._largo += 1
+
+    def agregar(self, p: PartidoCrudo) -> None:
+        self.agregar_valores(*(getattr(p, c) for c in COLUMNAS_CRUDO))
+
+    def extend(self, partidos: Iterable[PartidoCrudo]) -> None:
+        for p in partidos:
+            self.agregar(p)
+
+    def extender(self, otras: "ColumnasPartidos") -> None:
+        """Concatena las columnas de `otras` al final, columna por columna."""
+        for c, col in self._columnas.items():
+            (col.extender if c in COLUMNAS_CATEGORICAS else col.extend)(otras._columnas[c])
+        self._largo += len(otras)
+
+    def __len__(self) -> int:
+        return self._largo
+
+    def __getitem__(self, i: int) -> PartidoCrudo:
+        if i < 0:
+            i += self._largo
+        if not 0 <= i < self._largo:
+            raise IndexError(i)
+        return PartidoCrudo(**{c: col[i] for c, col in self._columnas.items()})
+
+    def __iter__(self) -> Iterator[PartidoCrudo]:
+        for fila in zip(*self._columnas.values()):
+            yield PartidoCrudo(*fila)
+
+    def a_dataframe(self) -> pd.DataFrame:
+        datos = {}
+        for c, col in self._columnas.items():
+            if c in COLUMNAS_ENTERAS:
+                datos[c] = np.frombuffer(col, dtype=np.int64).copy()
+            elif c in COLUMNAS_CATEGORICAS:
+                datos[c] = col.a_categorical()
+            else:
+                datos[c] = col
+        return pd.DataFrame(datos, columns=COLUMNAS_CRUDO)
+
+
 def _fecha_iso(temporada: int, mes_3: str, dia: int) -> str | None:
     mes_3 = mes_3.strip()
     if mes_3 not in MESES:
@@ -139,118 +419,352 @@ def _extraer_tokens_serie(linea: str):
     return equipo_a, pais_a, equipo_b, pais_b, ida, vuelta, agregado
 
 
-def parsear_archivo_rsssf(ruta_txt: Path, temporada: int, fuente: str = "RSSSF") -> list[PartidoCrudo]:
-    partidos: list[PartidoCrudo] = []
+# ====== GOLEADORES ======
+
+# Un gol dentro de un corchete de goleadores, ya separado por comas:
+# "Luis Tejada 9", "58" (mismo jugador que el anterior), "Cicinho 45+1", "Ernesto Farias 90+2pen",
+# "Andrei Girotto 90+" (adicional sin minutos), "Julio Cesar Baldivieso 85 pen",
+# "Luis Capurro 52 own goal", "Daniel Vaca 22og", "Saravia o/g", "Rivera(2)" (dos goles sin minuto), "L.Gómez"
+RE_TOKEN_GOL = re.compile(
+    r"^(?P<jugador>.*?)"
+    r"(?:\s*\((?P<cantidad>\d+)\))?"
+    r"(?:\s*(?P<minuto>\d{1,3})(?P<mas>\+(?P<adicional>\d{1,2})?)?"
+    r"(?P<sufijo>[a-z/]*|\s+(?:pen|own goal|og|o/g)))?"
+    r"(?:\s+(?P<og>o/g|og|own goal))?\s*$"
+)
+
+# Coma faltante entre líneas de un corchete: "71 Andrés Chávez 77" son dos goles,
+# el 71 del jugador anterior y el 77 de Andrés Chávez
+RE_MINUTO_SIN_COMA = re.compile(
+    r"^(?P<minuto>\d{1,3}(?:\+\d{0,2})?)\s+(?!(?:pen|p|og|o/g|own goal)\b)(?P<resto>[^\W\d_].*)$"
+)
+
+# Notas entre paréntesis que no son cantidad de goles: "100 (90+10)"
+RE_NOTA_PARENTESIS = re.compile(r"\((?!\d+\))[^)]*\)")
+
+# Corchetes que son notas y no goleadores: "[Note: ...]", "[in Ipatinga]"
+RE_CORCHETE_NOTA = re.compile(r"^(?:[A-Za-z ]+:|in |at |abandoned|awarded)")
+
+SUFIJOS_PENAL = ("pen", "p", "penal")
+SUFIJOS_EN_CONTRA = ("og", "o/g", "own goal")
+
+# Lado de un gol. "desconocido": el corchete no separa local y visitante con ";"
+# pero los dos equipos hicieron goles, así que no se puede saber de quién es cada uno.
+LADOS = ("local", "visitante", "desconocido")
+
+# Un corchete de goleadores sin cerrar se sigue leyendo a lo sumo en estas líneas
+MAX_LINEAS_CORCHETE = 4
+
+
+def _tokens_gol(parte: str) -> Iterator[str]:
+    """Tokens de gol de un lado del corchete, sin restos de tipeo ("Maicon 89}", "Conca 90+2)")."""
+    for token in RE_NOTA_PARENTESIS.sub("", parte).replace("{", "").replace("}", "").split(","):
+        token = token.strip()
+        if token.count(")") > token.count("("):
+            token = token.replace(")", "").rstrip()
+        if not token:
+            continue
+        m = RE_MINUTO_SIN_COMA.match(token)
+        if m:
+            yield m.group("minuto")
+            token = m.group("resto")
+        yield token
+
+
+def _goles_desde_corchete(texto: str, temporada: int, clave_partido: str, gl: int, gv: int,
+                          archivo_fuente: str) -> list[GolCrudo]:
+    """
+    Parsea el contenido de un corchete de goleadores: "Luis Tejada 9, 58; Otro 90+1pen".
+    Antes del ";" van los goles del local y después los del visitante. Sin ";" RSSSF
+    lista a un solo equipo si solo uno hizo goles; si hicieron los dos, el corchete no
+    dice de quién es cada gol y el lado queda "desconocido".
+    """
+    texto = texto.strip()
+    if not texto or RE_CORCHETE_NOTA.match(texto):
+        return []
+
+    partes = texto.split(";")
+    if len(partes) == 2:
+        lados = [("local", partes[0]), ("visitante", partes[1])]
+    elif len(partes) == 1:
+        lado = "desconocido" if gl > 0 and gv > 0 else "local" if gl > 0 else "visitante"
+        lados = [(lado, partes[0])]
+    else:
+        return []  # formato inesperado: mejor no inventar
+
+    goles: list[GolCrudo] = []
+    for lado, parte in lados:
+        jugador_actual = ""
+        for token in _tokens_gol(parte):
+            m = RE_TOKEN_GOL.match(token)
+            jugador = m.group("jugador").strip()
+            if jugador:
+                jugador_actual = jugador
+            elif not jugador_actual:
+                continue  # minuto suelto sin jugador previo
+            sufijo = (m.group("sufijo") or "").strip()
+            minuto = int(m.group("minuto")) if m.group("minuto") else None
+            adicional = int(m.group("adicional")) if m.group("adicional") else None
+            cantidad = int(m.group("cantidad")) if m.group("cantidad") else 1
+            for _ in range(cantidad):
+                goles.append(GolCrudo(
+                    temporada=temporada,
+                    clave_partido=clave_partido,
+                    lado=lado,
+                    jugador=jugador_actual,
+                    minuto=minuto,
+                    minuto_adicional=adicional,
+                    penal=sufijo in SUFIJOS_PENAL,
+                    en_contra=bool(m.group("og")) or sufijo in SUFIJOS_EN_CONTRA,
+                    archivo_fuente=archivo_fuente,
+                ))
+    return goles
+
+
+def clave_partido(temporada: int, fecha: str | None, local: str, visitante: str) -> str:
+    return f"{temporada}|{fecha or ''}|{local}|{visitante}"
+
+
+def _asignar_corchete(texto: str, pendientes: list[tuple[str, int, int]], goles: list[GolCrudo],
+                      temporada: int, archivo_fuente: str) -> None:
+    # el corchete corresponde al primer partido que todavía no tiene goleadores;
+    # un 0-0 no tiene goleadores (ida 0-0 con un solo corchete, el de la vuelta)
+    if pendientes:
+        if not RE_CORCHETE_NOTA.match(texto.strip()):
+            while len(pendientes) > 1 and pendientes[0][1] + pendientes[0][2] == 0:
+                pendientes.pop(0)
+        clave, gl, gv = pendientes.pop(0)
+        goles.extend(_goles_desde_corchete(texto, temporada, clave, gl, gv, archivo_fuente))
+
+
+# ====== INSTRUMENTACIÓN (opt-in) ======
+
+class _RegexCronometrada:
+    """Envuelve la regex combinada: cuenta y cronometra cada match según la regla ganadora."""
+
+    __slots__ = ("_regex", "_instr")
+
+    def __init__(self, regex: re.Pattern, instr: "InstrumentacionParser"):
+        self._regex = regex
+        self._instr = instr
+
+    def match(self, s: str):
+        t0 = time.perf_counter()
+        m = self._regex.match(s)
+        self._instr.registrar(m.lastgroup if m else "sin_regla", time.perf_counter() - t0)
+        return m
+
+
+class InstrumentacionParser:
+    """
+    Métricas del parser: conteo y tiempo acumulado por regla, líneas/seg por archivo
+    e índice de líneas no vacías que no matchearon nada.
+    Se activa pasando una instancia a parsear_columnas_rsssf; sin ella el parser usa las
+    funciones originales y solo paga un `is not None` por línea descartada.
+    """
+
+    def __init__(self):
+        self.conteos: Counter = Counter()
+        self.segundos: defaultdict[str, float] = defaultdict(float)
+        self.archivos: list[dict] = []
+        self.sin_match: list[dict] = []
+
+    def registrar(self, regla: str, segundos: float) -> None:
+        self.conteos[regla] += 1
+        self.segundos[regla] += segundos
+
+    def envolver_regex(self, regex: re.Pattern) -> _RegexCronometrada:
+        return _RegexCronometrada(regex, self)
+
+    def envolver_prefiltro(self, fn):
+        def prefiltro(s: str) -> bool:
+            t0 = time.perf_counter()
+            ok = fn(s)
+            if not ok:
+                self.registrar("prefiltro_descartada", time.perf_counter() - t0)
+            return ok
+        return prefiltro
+
+    def envolver_serie(self, fn):
+        def serie(s: str):
+            t0 = time.perf_counter()
+            r = fn(s)
+            self.registrar("serie" if r else "serie_fallida", time.perf_counter() - t0)
+            return r
+        return serie
+
+    def registrar_archivo(self, archivo: str, formato: str, lineas: int, segundos: float) -> None:
+        self.archivos.append({
+            "archivo": archivo,
+            "formato": formato,
+            "lineas": lineas,
+            "segundos": round(segundos, 6),
+            "lineas_por_segundo": round(lineas / segundos, 1) if segundos > 0 else None,
+        })
+
+    def registrar_sin_match(self, archivo: str, nro_linea: int, texto: str) -> None:
+        self.sin_match.append({"archivo": archivo, "linea": nro_linea, "texto": texto})
+
+    def resumen(self) -> dict:
+        return {
+            "reglas": {
+                regla: {"conteo": self.conteos[regla], "segundos": round(self.segundos[regla], 6)}
+                for regla in sorted(self.conteos, key=lambda r: -self.segundos[r])
+            },
+            "archivos": self.archivos,
+            "lineas_sin_match": self.sin_match,
+        }
+
+    def exportar_json(self, ruta: Path) -> None:
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        ruta.write_text(json.dumps(self.resumen(), ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def parsear_columnas_rsssf(ruta_txt: Path, temporada: int, fuente: str = "RSSSF",
+                          instrumentacion: InstrumentacionParser | None = None,
+                          goles: list[GolCrudo] | None = None) -> ColumnasPartidos:
+    """
+    Parsea un archivo de temporada a columnas: cada partido se agrega con
+    ColumnasPartidos.agregar_valores desde los grupos del match, sin armar un PartidoCrudo.
+    Si se pasa `goles`, en la misma pasada se leen los corchetes de goleadores que
+    siguen a cada partido y se agregan ahí como GolCrudo.
+    """
+    columnas = ColumnasPartidos()
+    agregar = columnas.agregar_valores
+    archivo = ruta_txt.name
 
     grupo_actual: str | None = None
 
+    # estado de goleadores: partidos que esperan su corchete (grupos: 1; series: ida y vuelta)
+    # y corchete multi-línea en curso
+    pendientes: list[tuple[str, int, int]] = []
+    corchete: list[str] | None = None
+
     # estado de eliminatorias
     fase_actual: str | None = None
     mes_ida: str | None = None
     dia_ida: int | None = None
     dia_vuelta: int | None = None
 
-    lineas = ruta_txt.read_text(encoding="utf-8", errors="replace").splitlines()
+    # normalizar variantes de guion una sola vez sobre todo el texto (no por línea)
+    texto = ruta_txt.read_text(encoding="utf-8", errors="replace")
+    for guion in GUIONES:
+        texto = texto.replace(guion, "-")
+    lineas = texto.splitlines()
+    formato = detectar_formato(lineas)
+
+    re_linea = RE_LINEA_POR_FORMATO[formato]
+    puede_matchear = _puede_matchear_regla
+    extraer_serie = _extraer_tokens_serie
+    if instrumentacion is not None:
+        re_linea = instrumentacion.envolver_regex(re_linea)
+        puede_matchear = instrumentacion.envolver_prefiltro(puede_matchear)
+        extraer_serie = instrumentacion.envolver_serie(extraer_serie)
+        t0 = time.perf_counter()
 
     i = 0
-    while i < len(lineas):
-        # normalizar variantes de guion antes de cualquier match
-        # \x96 = en-dash cp1252, u2013 = en-dash unicode, u2014 = em-dash
-        linea = lineas[i].rstrip().replace("\x96", "-").replace("–", "-").replace("—", "-")
+    n = len(lineas)
+    while i < n:
+        s = lineas[i].strip()
+        i += 1
 
-        if not linea.strip():
-            i += 1
+        if not s:
             continue
 
+        if goles is not None:
+            # continuación de un corchete de goleadores que quedó abierto
+            if corchete is not None:
+                if "]" in s or s[0] in ",;" or corchete[-1].rstrip()[-1:] in ",;":
+                    cierre = s.find("]")
+                    corchete.append(s if cierre < 0 else s[:cierre])
+                    if cierre >= 0 or len(corchete) >= MAX_LINEAS_CORCHETE:
+                        _asignar_corchete(" ".join(corchete), pendientes, goles, temporada, archivo)
+                        corchete = None
+                    continue
+                # la línea no continúa el corchete: lo cerramos con lo que hay
+                _asignar_corchete(" ".join(corchete), pendientes, goles, temporada, archivo)
+                corchete = None
+
+            # corchete de goleadores: corresponde al próximo partido pendiente
+            if s[0] == "[":
+                cierre = s.find("]")
+                if cierre < 0:
+                    corchete = [s[1:]]
+                else:
+                    _asignar_corchete(s[1:cierre], pendientes, goles, temporada, archivo)
+                continue
+
+            # cualquier otra línea corta la asociación partido -> corchete
+            pendientes.clear()
+
+        # clasificar la línea: prefiltro barato + una sola regex combinada
+        m = re_linea.match(s) if puede_matchear(s) else None
+        regla = m.lastgroup if m else None
+
         # ignorar tabla
-        if RE_TABLA.match(linea):
-            i += 1
+        if regla == "tabla":
             continue
 
         # grupo
-        m_grupo = RE_GRUPO.match(linea.strip())
-        if m_grupo:
-            grupo_actual = f"Group {m_grupo.group('grupo')}"
-            i += 1
+        if regla == "grupo":
+            grupo_actual = f"Group {m.group('grupo_grupo')}"
             continue
 
         # header eliminatorias en una línea: "Second Round (May 1 & 8)"
-        m_fase_fechas = RE_FASE_CON_FECHAS.match(linea.strip())
-        if m_fase_fechas:
-            fase_actual = m_fase_fechas.group("fase").strip()
-            mes_ida = m_fase_fechas.group("mes").strip()
-            dia_ida = int(m_fase_fechas.group("dia_ida"))
-            dia_vuelta = int(m_fase_fechas.group("dia_vuelta"))
+        if regla == "fase_fechas":
+            fase_actual = m.group("fase_fechas_fase").strip()
+            mes_ida = m.group("fase_fechas_mes").strip()
+            dia_ida = int(m.group("fase_fechas_dia_ida"))
+            dia_vuelta = int(m.group("fase_fechas_dia_vuelta"))
             grupo_actual = None  # salimos de grupos
-            i += 1
             continue
 
         # header fase sola (dos líneas)
-        m_fase_sola = RE_FASE_SOLA.match(linea.strip())
-        if m_fase_sola:
-            fase_actual = linea.strip()
+        if regla == "fase_sola":
+            fase_actual = s
             # si la siguiente línea es "(Apr 16 & 22)", la consumimos
-            if i + 1 < len(lineas):
-                prox = lineas[i + 1].strip()
-                m_solo_fechas = RE_SOLO_FECHAS.match(prox)
+            if i < n:
+                m_solo_fechas = RE_SOLO_FECHAS.match(lineas[i].strip())
                 if m_solo_fechas:
                     mes_ida = m_solo_fechas.group("mes").strip()
                     dia_ida = int(m_solo_fechas.group("dia_ida"))
                     dia_vuelta = int(m_solo_fechas.group("dia_vuelta"))
                     grupo_actual = None
-                    i += 2
-                    continue
-            i += 1
+                    i += 1
             continue
 
         # línea solo-fechas dentro de una fase: "(May 8 & 15)"
-        m_solo_fechas = RE_SOLO_FECHAS.match(linea.strip())
-        if m_solo_fechas and fase_actual:
-            mes_ida = m_solo_fechas.group("mes").strip()
-            dia_ida = int(m_solo_fechas.group("dia_ida"))
-            dia_vuelta = int(m_solo_fechas.group("dia_vuelta"))
-            i += 1
+        if regla == "solo_fechas":
+            if fase_actual:
+                mes_ida = m.group("solo_fechas_mes").strip()
+                dia_ida = int(m.group("solo_fechas_dia_ida"))
+                dia_vuelta = int(m.group("solo_fechas_dia_vuelta"))
             continue
 
-        # partido de grupos (estándar, luego formato alternativo)
-        _m_std = RE_PARTIDO_GRUPOS.match(linea.strip())
-        _m_alt = RE_PARTIDO_GRUPOS_ALT.match(linea.strip())
+        # partido de grupos (estándar, pegado o formato alternativo según el archivo)
         # usar ALT solo si visitante no queda en blanco (evita falsos positivos en 1997)
-        m_pg = _m_std or (_m_alt if _m_alt and _m_alt.group("visitante").strip() else None)
-        if m_pg:
-            mes = m_pg.group("mes")
-            dia = int(m_pg.group("dia"))
-            local = m_pg.group("local").strip()
-            visitante = m_pg.group("visitante").strip()
-            gl = int(m_pg.group("goles_local"))
-            gv = int(m_pg.group("goles_visitante"))
+        if regla in ("partido", "partido_pegado") or (
+            regla == "partido_alt" and m.group("partido_alt_visitante").strip()
+        ):
+            mes = m.group(f"{regla}_mes")
+            dia = int(m.group(f"{regla}_dia"))
+            local = m.group(f"{regla}_local").strip()
+            visitante = m.group(f"{regla}_visitante").strip()
+            gl = int(m.group(f"{regla}_goles_local"))
+            gv = int(m.group(f"{regla}_goles_visitante"))
 
             fecha = _fecha_iso(temporada, mes, dia)
+            if goles is not None:
+                pendientes[:] = [(clave_partido(temporada, fecha, local, visitante), gl, gv)]
 
-            partidos.append(
-                PartidoCrudo(
-                    temporada=temporada,
-                    etapa="Grupos",
-                    grupo=grupo_actual,
-                    instancia=None,
-                    fecha=fecha,
-                    equipo_local=local,
-                    equipo_visitante=visitante,
-                    goles_local=gl,
-                    goles_visitante=gv,
-                    agregado_texto=None,
-                    fuente=fuente,
-                    archivo_fuente=ruta_txt.name,
-                    linea_partido=linea.strip(),
-                )
-            )
-            i += 1
+            agregar(temporada, "Grupos", grupo_actual, None, fecha, local, visitante, gl, gv, None,
+                    fuente, archivo, s)
             continue
 
         # línea de serie (eliminatorias)
         # Solo intentamos parsearla si tenemos fase + fechas cargadas
         if fase_actual and mes_ida and dia_ida and dia_vuelta:
-            serie = _extraer_tokens_serie(linea)
+            serie = extraer_serie(s)
             if serie:
                 equipo_a, pais_a, equipo_b, pais_b, ida, vuelta, agregado = serie
 
@@ -260,74 +774,262 @@ def parsear_archivo_rsssf(ruta_txt: Path, temporada: int, fuente: str = "RSSSF")
 
                 fecha_ida_iso = _fecha_iso(temporada, mes_ida, dia_ida)
                 fecha_vta_iso = _fecha_iso(temporada, mes_ida, dia_vuelta)
+                if goles is not None:
+                    pendientes[:] = [
+                        (clave_partido(temporada, fecha_ida_iso, equipo_a, equipo_b), gl_ida, gv_ida),
+                        (clave_partido(temporada, fecha_vta_iso, equipo_b, equipo_a), gv_vta, gl_vta),
+                    ]
 
-                partidos.append(
-                    PartidoCrudo(
-                        temporada=temporada,
-                        etapa=fase_actual,
-                        grupo=None,
-                        instancia="Ida",
-                        fecha=fecha_ida_iso,
-                        equipo_local=equipo_a,
-                        equipo_visitante=equipo_b,
-                        goles_local=gl_ida,
-                        goles_visitante=gv_ida,
-                        agregado_texto=agregado,
-                        fuente=fuente,
-                        archivo_fuente=ruta_txt.name,
-                        linea_partido=linea.strip(),
-                    )
-                )
-                partidos.append(
-                    PartidoCrudo(
-                        temporada=temporada,
-                        etapa=fase_actual,
-                        grupo=None,
-                        instancia="Vuelta",
-                        fecha=fecha_vta_iso,
-                        equipo_local=equipo_b,
-                        equipo_visitante=equipo_a,
-                        goles_local=gv_vta,   # ojo: invertimos porque ahora local=equipo_b
-                        goles_visitante=gl_vta,
-                        agregado_texto=agregado,
-                        fuente=fuente,
-                        archivo_fuente=ruta_txt.name,
-                        linea_partido=linea.strip(),
-                    )
-                )
-
-                i += 1
+                agregar(temporada, fase_actual, None, "Ida", fecha_ida_iso, equipo_a, equipo_b,
+                        gl_ida, gv_ida, agregado, fuente, archivo, s)
+                # ojo: en la vuelta invertimos los goles porque ahora local=equipo_b
+                agregar(temporada, fase_actual, None, "Vuelta", fecha_vta_iso, equipo_b, equipo_a,
+                        gv_vta, gl_vta, agregado, fuente, archivo, s)
                 continue
 
         # si no matchea nada, seguimos
-        i += 1
+        if instrumentacion is not None:
+            instrumentacion.registrar_sin_match(archivo, i, s)
 
-    return partidos
+    if goles is not None and corchete is not None:
+        _asignar_corchete(" ".join(corchete), pendientes, goles, temporada, archivo)
+
+    if instrumentacion is not None:
+        instrumentacion.registrar_archivo(archivo, formato, n, time.perf_counter() - t0)
+
+    return columnas
+
+
+def parsear_archivo_rsssf(ruta_txt: Path, temporada: int, fuente: str = "RSSSF",
+                          instrumentacion: InstrumentacionParser | None = None,
+                          goles: list[GolCrudo] | None = None) -> list[PartidoCrudo]:
+    """
+    API de filas: los partidos de un archivo como PartidoCrudo, en el orden del archivo.
+    No es streaming: el archivo se parsea entero a columnas (el lote del parser es una
+    temporada, ver iterar_carpeta) y las filas se arman desde ahí.
+    """
+    return list(parsear_columnas_rsssf(ruta_txt, temporada, fuente=fuente, instrumentacion=instrumentacion,
+                                       goles=goles))
 
 
-def exportar_csv_crudo(partidos: list[PartidoCrudo], ruta_salida: Path) -> None:
+def exportar_csv_crudo(partidos: Iterable[PartidoCrudo] | ColumnasPartidos, ruta_salida: Path) -> None:
     ruta_salida.parent.mkdir(parents=True, exist_ok=True)
-    df = pd.DataFrame([asdict(p) for p in partidos])
+    if not isinstance(partidos, ColumnasPartidos):
+        partidos = ColumnasPartidos(partidos)
+    df = partidos.a_dataframe()
     df.to_csv(ruta_salida, index=False, encoding="utf-8")
 
 
-def main():
-    carpeta = Path("datos/rsssf")
-    salida = Path("datos/crudos/partidos_rsssf_raw.csv")
+def goles_a_dataframe(goles: Iterable[GolCrudo]) -> pd.DataFrame:
+    df = pd.DataFrame([[getattr(g, c) for c in COLUMNAS_GOLES] for g in goles], columns=COLUMNAS_GOLES)
+    # minutos con nulos: Int64 para que no pasen a float (y el CSV no escriba "45.0")
+    return df.astype({
+        "temporada": "int64", "minuto": "Int64", "minuto_adicional": "Int64",
+        "penal": "bool", "en_contra": "bool", "lado": "category", "archivo_fuente": "category",
+    })
+
+
+COLUMNAS_DESCUADRE = ["clave_partido", "archivo_fuente", "goles_local", "goles_visitante",
+                      "filas_local", "filas_visitante", "filas_desconocido"]
+
+
+def goles_descuadrados(partidos: pd.DataFrame, goles: pd.DataFrame) -> pd.DataFrame:
+    """
+    Partidos con goleadores cuyas filas de gol no cuadran con el marcador: por lado
+    (filas "local"/"visitante" contra goles_local/goles_visitante) o, si hay goles de
+    lado "desconocido", en el total. Los partidos sin corchete de goleadores no entran.
+    """
+    filas = (
+        pd.crosstab(goles["clave_partido"], goles["lado"].astype(str))
+        .reindex(columns=list(LADOS), fill_value=0)
+        .add_prefix("filas_")
+    )
+    claves = (partidos["temporada"].astype(str) + "|" + partidos["fecha"].fillna("").astype(str) + "|"
+              + partidos["equipo_local"].astype(str) + "|" + partidos["equipo_visitante"].astype(str))
+    df = (
+        partidos[["archivo_fuente", "goles_local", "goles_visitante"]]
+        .assign(clave_partido=claves.to_numpy())
+        .drop_duplicates("clave_partido")
+        .join(filas, on="clave_partido", how="inner")
+    )
+    por_lado = (df["filas_local"] != df["goles_local"]) | (df["filas_visitante"] != df["goles_visitante"])
+    total = df[["filas_local", "filas_visitante", "filas_desconocido"]].sum(axis=1) != df["goles_local"] + df["goles_visitante"]
+    excedido = (df["filas_local"] > df["goles_local"]) | (df["filas_visitante"] > df["goles_visitante"])
+    descuadre = np.where(df["filas_desconocido"] > 0, total | excedido, por_lado)
+    return df.loc[descuadre, COLUMNAS_DESCUADRE].reset_index(drop=True)
+
+
+def reportar_goles_descuadrados(descuadrados: pd.DataFrame, ruta: Path | None = None) -> None:
+    ruta = RUTA_REPORTE_GOLES if ruta is None else ruta
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    descuadrados.to_csv(ruta, index=False, encoding="utf-8")
+
+
+def temporada_desde_archivo(ruta: Path) -> int:
+    try:
+        return int(ruta.stem)
+    except ValueError:
+        raise ValueError(f"El archivo {ruta.name} debe llamarse como el año, ej: 1996.txt")
 
-    partidos_total: list[PartidoCrudo] = []
 
-    for ruta in sorted(carpeta.glob("*.txt")):
+# ====== CACHE DE PARSEO ======
+
+CARPETA_CACHE = Path("datos/cache/parser_rsssf")
+
+# cualquier cambio en este archivo invalida el cache completo
+VERSION_PARSER = hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:16]
+
+
+def clave_cache(contenido: bytes, fuente: str = "RSSSF") -> str:
+    h = hashlib.sha256(contenido)
+    h.update(f"|{VERSION_PARSER}|{fuente}".encode("utf-8"))
+    return h.hexdigest()[:32]
+
+
+def _parsear_temporada_completa(ruta: Path, fuente: str = "RSSSF") -> tuple[ColumnasPartidos, list[GolCrudo]]:
+    goles: list[GolCrudo] = []
+    partidos = parsear_columnas_rsssf(ruta, temporada=temporada_desde_archivo(ruta), fuente=fuente, goles=goles)
+    return partidos, goles
+
+
+def parsear_temporada_con_cache(ruta: Path, carpeta_cache: Path = CARPETA_CACHE,
+                                fuente: str = "RSSSF") -> tuple[ColumnasPartidos, list[GolCrudo]]:
+    """
+    Devuelve (partidos, goles) de una temporada desde el cache si el contenido del .txt
+    y la versión del parser no cambiaron; si no, parsea y guarda.
+    Un archivo por temporada: <carpeta_cache>/<año>-<clave>.pkl (la clave va en el
+    nombre, así el hit es un simple exists() sin abrir nada).
+    """
+    clave = clave_cache(ruta.read_bytes(), fuente)
+    ruta_cache = carpeta_cache / f"{ruta.stem}-{clave}.pkl"
+
+    if ruta_cache.exists():
         try:
-            temporada = int(ruta.stem)
-        except ValueError:
-            raise ValueError(f"El archivo {ruta.name} debe llamarse como el año, ej: 1996.txt")
+            with ruta_cache.open("rb") as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            pass  # cache corrupto o de otra versión de la clase: re-parseamos
+
+    resultado = _parsear_temporada_completa(ruta, fuente=fuente)
+
+    carpeta_cache.mkdir(parents=True, exist_ok=True)
+    for viejo in carpeta_cache.glob(f"{ruta.stem}-*.pkl"):
+        viejo.unlink(missing_ok=True)
+    # escritura atómica: si el proceso muere a mitad, no queda un .pkl truncado
+    tmp = ruta_cache.with_name(f"{ruta_cache.name}.{os.getpid()}.tmp")
+    with tmp.open("wb") as f:
+        pickle.dump(resultado, f, protocol=pickle.HIGHEST_PROTOCOL)
+    tmp.replace(ruta_cache)
+    return resultado
+
+
+def _parsear_temporada(ruta: Path, carpeta_cache: Path | None = None) -> tuple[ColumnasPartidos, list[GolCrudo]]:
+    # función de nivel módulo para que sea picklable por el process pool;
+    # devolvemos columnas para que viajen entre procesos sin un objeto por fila
+    if carpeta_cache is not None:
+        return parsear_temporada_con_cache(ruta, carpeta_cache)
+    return _parsear_temporada_completa(ruta)
+
+
+def iterar_carpeta(rutas: list[Path], workers: int = 1, carpeta_cache: Path | None = None,
+                   instrumentacion: InstrumentacionParser | None = None
+                   ) -> Iterator[tuple[ColumnasPartidos, list[GolCrudo]]]:
+    """
+    Emite (partidos, goles) de cada temporada, en el orden de `rutas`: un lote columnar
+    por archivo, así que quien consume nunca necesita tener más de una temporada a la vez.
+    Con workers > 1 reparte los archivos en un process pool; `map` devuelve los
+    resultados en el orden de entrada, así que la salida es idéntica sin importar N.
+    Con carpeta_cache solo se re-parsean los archivos cuyo contenido cambió.
+    Con instrumentacion se parsea todo secuencialmente y sin cache, para medir.
+    """
+    # validamos nombres antes de repartir trabajo
+    for ruta in rutas:
+        temporada_desde_archivo(ruta)
+
+    if instrumentacion is not None:
+        for ruta in rutas:
+            goles: list[GolCrudo] = []
+            partidos = parsear_columnas_rsssf(ruta, temporada=temporada_desde_archivo(ruta),
+                                              instrumentacion=instrumentacion, goles=goles)
+            yield partidos, goles
+        return
+
+    parsear = partial(_parsear_temporada, carpeta_cache=carpeta_cache)
+    if workers > 1 and len(rutas) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(rutas))) as pool:
+            yield from pool.map(parsear, rutas)
+    else:
+        for ruta in rutas:
+            yield parsear(ruta)
+
+
+CARPETA_RSSSF = Path("datos/rsssf")
+RUTA_SALIDA = Path("datos/crudos/partidos_rsssf_raw.parquet")
+RUTA_SALIDA_GOLES = Path("datos/crudos/goles_rsssf_raw.parquet")
+RUTA_REPORTE_GOLES = Path("reportes/qa/goles_descuadrados.csv")
+
+
+def parsear_capas(rutas: list[Path], workers: int = 1, carpeta_cache: Path | None = CARPETA_CACHE,
+                  instrumentacion: InstrumentacionParser | None = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Parsea las temporadas y devuelve (partidos, goles) como DataFrames de la capa cruda."""
+    partidos = ColumnasPartidos()
+    goles: list[GolCrudo] = []
+    for partidos_temporada, goles_temporada in iterar_carpeta(rutas, workers=workers, carpeta_cache=carpeta_cache,
+                                                              instrumentacion=instrumentacion):
+        partidos.extender(partidos_temporada)
+        goles.extend(goles_temporada)
+    return partidos.a_dataframe(), goles_a_dataframe(goles)
+
+
+def main(argv: list[str] | None = None):
+    ap = argparse.ArgumentParser(
+        description="Parsea datos/rsssf/*.txt a datos/crudos/partidos_rsssf_raw + goles_rsssf_raw (Parquet + CSV)"
+    )
+    ap.add_argument("--workers", type=int, default=1,
+                    help="procesos en paralelo (1 = secuencial)")
+    ap.add_argument("--sin-cache", action="store_true",
+                    help=f"ignora el cache de parseo en {CARPETA_CACHE} y re-parsea todo")
+    ap.add_argument("--instrumentar", type=Path, metavar="RUTA_JSON",
+                    help="mide conteo/tiempo por regla y líneas/seg, y exporta el índice de líneas sin match "
+                         "(implica secuencial y sin cache)")
+    args = ap.parse_args(argv)
+
+    rutas = sorted(CARPETA_RSSSF.glob("*.txt"))
+    carpeta_cache = None if args.sin_cache else CARPETA_CACHE
+    instrumentacion = InstrumentacionParser() if args.instrumentar else None
+
+    # streaming: cada temporada se escribe como un lote (row group + append al CSV) y se
+    # suelta; en memoria nunca hay más de una temporada
+    descuadrados: list[pd.DataFrame] = []
+    with EscritorCapa(RUTA_SALIDA, esquema=ESQUEMA_CRUDO) as esc_partidos, \
+            EscritorCapa(RUTA_SALIDA_GOLES, esquema=ESQUEMA_GOLES) as esc_goles:
+        for partidos, goles in iterar_carpeta(rutas, workers=args.workers, carpeta_cache=carpeta_cache,
+                                              instrumentacion=instrumentacion):
+            if not len(partidos):
+                continue
+            df_partidos = partidos.a_dataframe()
+            esc_partidos.escribir(df_partidos)
+            if goles:
+                df_goles = goles_a_dataframe(goles)
+                esc_goles.escribir(df_goles)
+                descuadrados.append(goles_descuadrados(df_partidos, df_goles))
+        esc_partidos.cerrar(vacio=ColumnasPartidos().a_dataframe())
+        esc_goles.cerrar(vacio=goles_a_dataframe([]))
+
+    print(f"OK -> {RUTA_SALIDA} | partidos={esc_partidos.filas} | archivos={len(rutas)}")
+    print(f"OK -> {RUTA_SALIDA_GOLES} | goles={esc_goles.filas}")
 
-        partidos = parsear_archivo_rsssf(ruta, temporada=temporada)
-        partidos_total.extend(partidos)
+    descuadrados = pd.concat(descuadrados, ignore_index=True) if descuadrados else pd.DataFrame(columns=COLUMNAS_DESCUADRE)
+    reportar_goles_descuadrados(descuadrados)
+    print(f"Goleadores que no cuadran con el marcador: {len(descuadrados)} partidos -> {RUTA_REPORTE_GOLES}")
 
-    exportar_csv_crudo(partidos_total, salida)
-    print(f"OK -> {salida} | partidos={len(partidos_total)} | archivos={len(list(carpeta.glob('*.txt')))}")
+    if instrumentacion is not None:
+        instrumentacion.exportar_json(args.instrumentar)
+        print("\nRegla                      conteo    ms")
+        for regla, r in instrumentacion.resumen()["reglas"].items():
+            print(f"{regla:<24} {r['conteo']:>8} {r['segundos'] * 1000:>7.1f}")
+        print(f"Líneas sin match: {len(instrumentacion.sin_match)}")
+        print(f"Instrumentación -> {args.instrumentar}")
 
 
 if __name__ == "__main__":
@@ -1,9 +1,14 @@
+import sys
 from pathlib import Path
+import numpy as np
 import pandas as pd
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # src/, para importar almacen
+from almacen import escribir_capa, leer_capa
 
-RUTA_ENTRADA = Path("datos/crudos/partidos_rsssf_raw.csv")
-RUTA_SALIDA = Path("datos/intermedios/partidos_rsssf.csv")
+
+RUTA_ENTRADA = Path("datos/crudos/partidos_rsssf_raw.parquet")
+RUTA_SALIDA = Path("datos/intermedios/partidos_rsssf.parquet")
 
 
 def resultado_desde_goles(gl: int, gv: int) -> str:
@@ -34,52 +39,78 @@ def fase_desde_etapa(etapa: str | None) -> str | None:
     return etapa
 
 
-def main():
-    df = pd.read_csv(RUTA_ENTRADA)
+def categoria_constante(valor: str, n: int) -> pd.Categorical:
+    # una sola categoría: códigos en int8 en vez de n referencias a strings
+    return pd.Categorical.from_codes(np.zeros(n, dtype="int8"), categories=[valor])
+
+
+def fases_desde_etapas(etapas: pd.Series) -> pd.Categorical:
+    # fase_desde_etapa corre una vez por etapa distinta (son ~10), no una vez por fila
+    codigos, unicas = pd.factorize(etapas)
+    fases = [fase_desde_etapa(e) for e in unicas]
+    categorias = list(dict.fromkeys(fases))
+    recodificar = np.array([categorias.index(f) for f in fases] + [-1], dtype="int8")
+    # codigos == -1 (etapa nula) cae en el último elemento: sigue siendo nulo
+    return pd.Categorical.from_codes(recodificar[codigos], categories=categorias)
+
+
+def resultados_desde_goles(gl: np.ndarray, gv: np.ndarray) -> pd.Categorical:
+    codigos = np.select([gl > gv, gl < gv], [0, 1], default=2).astype("int8")
+    return pd.Categorical.from_codes(codigos, categories=["L", "V", "E"])
+
 
-    # columnas base v1
-    df_v1 = pd.DataFrame()
+def transformar(df: pd.DataFrame) -> pd.DataFrame:
+    n = len(df)
+    es_grupo = (df["etapa"] == "Grupos").to_numpy()
+
+    # columnas base v1 (mismo orden que el CSV de salida)
+    df_v1 = pd.DataFrame(index=df.index)
     df_v1["temporada"] = df["temporada"].astype("int64")
-    df_v1["competicion"] = "Copa Libertadores"
-    df_v1["fase"] = df["etapa"].apply(fase_desde_etapa)
+    df_v1["competicion"] = categoria_constante("Copa Libertadores", n)
+    df_v1["fase"] = fases_desde_etapas(df["etapa"])
 
     # instancia: grupos -> Group X ; series -> Ida/Vuelta
-    df_v1["instancia"] = df["instancia"]
-    df_v1.loc[df["etapa"] == "Grupos", "instancia"] = df["grupo"]
+    df_v1["instancia"] = df["instancia"].where(~es_grupo, df["grupo"]).astype("category")
 
     df_v1["fecha"] = df["fecha"]
 
     # sede (no disponible en RSSSF de forma consistente)
-    df_v1["pais_sede"] = ""
-    df_v1["ciudad_sede"] = ""
-    df_v1["estadio"] = ""
+    df_v1["pais_sede"] = categoria_constante("", n)
+    df_v1["ciudad_sede"] = categoria_constante("", n)
+    df_v1["estadio"] = categoria_constante("", n)
 
     # equipos
     df_v1["equipo_local"] = df["equipo_local"]
     df_v1["equipo_visitante"] = df["equipo_visitante"]
 
     # países de equipos (no disponible en grupos; en series podríamos extraer país_3 si lo agregamos luego)
-    df_v1["pais_local"] = ""
-    df_v1["pais_visitante"] = ""
+    df_v1["pais_local"] = categoria_constante("", n)
+    df_v1["pais_visitante"] = categoria_constante("", n)
 
     # goles y resultado
     df_v1["goles_local"] = df["goles_local"].astype("int64")
     df_v1["goles_visitante"] = df["goles_visitante"].astype("int64")
-    df_v1["resultado"] = [
-        resultado_desde_goles(gl, gv)
-        for gl, gv in zip(df_v1["goles_local"], df_v1["goles_visitante"])
-    ]
+    df_v1["resultado"] = resultados_desde_goles(
+        df_v1["goles_local"].to_numpy(), df_v1["goles_visitante"].to_numpy()
+    )
 
     # metadata
-    df_v1["fuente"] = df["fuente"]
-    df_v1["url_fuente"] = ""  # opcional: luego lo llenamos
-    df_v1["id_partido_fuente"] = ""
-    df_v1["observaciones"] = ""
+    df_v1["fuente"] = df["fuente"].astype("category")
+    df_v1["url_fuente"] = categoria_constante("", n)  # opcional: luego lo llenamos
+    df_v1["id_partido_fuente"] = categoria_constante("", n)
     # opcional: guardamos agregado en observaciones para no perderlo
-    df_v1.loc[df["agregado_texto"].notna(), "observaciones"] = "agregado=" + df["agregado_texto"].astype(str)
+    agregado = df["agregado_texto"]
+    df_v1["observaciones"] = ("agregado=" + agregado.astype(str)).where(agregado.notna(), "")
+
+    return df_v1
+
+
+def main():
+    df = leer_capa(RUTA_ENTRADA)
+
+    df_v1 = transformar(df)
 
-    RUTA_SALIDA.parent.mkdir(parents=True, exist_ok=True)
-    df_v1.to_csv(RUTA_SALIDA, index=False, encoding="utf-8")
+    escribir_capa(df_v1, RUTA_SALIDA)
     print(f"OK -> {RUTA_SALIDA} | filas={len(df_v1)}")
 
 
@@ -0,0 +1,42 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+from almacen import escribir_particiones, leer_capa
+
+
+def test_particion_reescrita_conserva_tipos(tmp_path):
+    carpeta = tmp_path / "capa"
+    base = pd.DataFrame({
+        "temporada": [2010, 2011],
+        "fase": pd.Categorical(["Grupos", "Final"]),
+        "equipo_local_id": pd.array([1, 2], dtype="Int32"),
+    })
+    escribir_particiones(base, carpeta, completa=True, exportar_csv=False)
+
+    # una fusión que llega con texto plano e int64 (y un id sin resolver)
+    nueva = pd.DataFrame({
+        "temporada": [2011, 2011],
+        "fase": ["Final", "Octavos"],
+        "equipo_local_id": [2.0, None],
+    })
+    assert escribir_particiones(nueva, carpeta, exportar_csv=False) == 1
+
+    leido = leer_capa(carpeta)
+    assert leido.dtypes.to_dict() == {
+        "temporada": "int64", "fase": "category", "equipo_local_id": pd.Int32Dtype(),
+    }
+    assert list(leido["fase"]) == ["Grupos", "Final", "Octavos"]
+    assert list(leido["equipo_local_id"].astype(object)) == [1, 2, pd.NA]
+
+
+def test_csv_unico_de_capa_particionada(tmp_path):
+    carpeta = tmp_path / "capa"
+    base = pd.DataFrame({"temporada": [2010, 2011, 2012], "goles": [1, 2, 3]})
+    escribir_particiones(base, carpeta, completa=True, exportar_csv=True)
+    escribir_particiones(pd.DataFrame({"temporada": [2011], "goles": [5]}), carpeta, exportar_csv=True)
+
+    esperado = pd.DataFrame({"temporada": [2010, 2011, 2012], "goles": [1, 5, 3]}).to_csv(index=False)
+    assert (tmp_path / "capa.csv").read_text(encoding="utf-8") == esperado
@@ -0,0 +1,28 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+from referencia.diccionario_equipos import asignar_ids, cargar_ids
+
+
+def _partidos():
+    return pd.DataFrame({"equipo_local": ["River Plate", "Olimpia"], "equipo_visitante": ["Olimpia", "Nuevo"]})
+
+
+def test_asignar_ids():
+    ids = pd.Series([1, 2], index=["River Plate", "Olimpia"], dtype="int32")
+    df = asignar_ids(_partidos(), ids)
+    assert df["equipo_local_id"].tolist() == [1, 2]
+    assert df["equipo_visitante_id"].tolist() == [2, pd.NA]
+    assert str(df["equipo_local_id"].dtype) == "Int32"
+
+
+def test_asignar_ids_diccionario_vacio(tmp_path):
+    # equipos_ids.csv inexistente (checkout nuevo): todos los ids en <NA>, sin IndexError
+    ids = cargar_ids(tmp_path / "equipos_ids.csv", mapa=pd.Series(dtype="str"))
+    assert ids.empty
+    df = asignar_ids(_partidos(), ids)
+    assert df["equipo_local_id"].isna().all() and df["equipo_visitante_id"].isna().all()
+    assert str(df["equipo_visitante_id"].dtype) == "Int32"
@@ -0,0 +1,37 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+from pipeline.fusionar_datos_ia import COLUMNAS_ESPERADAS, restaurar_tipos, validar_nuevo_csv
+
+
+def _nuevo(fechas: list[str]) -> pd.DataFrame:
+    df = pd.DataFrame({c: [""] * len(fechas) for c in COLUMNAS_ESPERADAS})
+    return df.assign(temporada=2011, fecha=fechas, goles_local=1, goles_visitante=0, resultado="L")
+
+
+def test_fecha_no_iso_es_invalida():
+    # parsear_fecha usa ISO 8601: "05/03/2011" quedaría NaT en fecha_parseada
+    errores = validar_nuevo_csv(_nuevo(["2011-03-05", "05/03/2011", "", "2011-13-01"]))
+    assert errores == [
+        "Fila 1: fecha '05/03/2011' inválida",
+        "Fila 3: fecha '2011-13-01' inválida",
+    ]
+
+
+def test_restaurar_tipos_de_la_base():
+    base = pd.DataFrame({
+        "fase": pd.Categorical(["Grupos"]),
+        "equipo_local_id": pd.array([1], dtype="Int32"),
+        "fecha_parseada": pd.to_datetime(["2011-03-05"]).astype("datetime64[us]"),
+    })
+    juntos = pd.concat([base, pd.DataFrame({
+        "fase": ["Octavos"], "equipo_local_id": [None], "fecha_parseada": pd.to_datetime(["2011-05-01"]),
+    })], ignore_index=True)
+
+    restaurado = restaurar_tipos(juntos, base.dtypes)
+    assert restaurado.dtypes.astype(str).to_dict() == base.dtypes.astype(str).to_dict()
+    assert list(restaurado["fase"]) == ["Grupos", "Octavos"]
+    assert list(restaurado["equipo_local_id"].astype(object)) == [1, pd.NA]
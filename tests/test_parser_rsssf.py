@@ -0,0 +1,133 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+from almacen import EscritorCapa
+from rsssf.parser_rsssf import (
+    ESQUEMA_CRUDO, ColumnasPartidos, PartidoCrudo, _goles_desde_corchete, goles_descuadrados,
+)
+
+
+def _goles(texto: str, gl: int = 9, gv: int = 0):
+    return _goles_desde_corchete(texto, 2000, "2000|2000-01-01|A|B", gl, gv, "2000.txt")
+
+
+def _uno(texto: str):
+    goles = _goles(texto)
+    assert len(goles) == 1
+    g = goles[0]
+    return g.jugador, g.minuto, g.minuto_adicional, g.penal, g.en_contra
+
+
+@pytest.mark.parametrize("texto, esperado", [
+    ("Luis Tejada 9", ("Luis Tejada", 9, None, False, False)),
+    ("Cicinho 45+1", ("Cicinho", 45, 1, False, False)),
+    ("Ernesto Farias 90+2pen", ("Ernesto Farias", 90, 2, True, False)),
+    ("Daniel Vaca 22og", ("Daniel Vaca", 22, None, False, True)),
+    ("Saravia o/g", ("Saravia", None, None, False, True)),
+    ("L.Gómez", ("L.Gómez", None, None, False, False)),
+    # sufijo separado por un espacio
+    ("Julio Cesar Baldivieso 85 pen", ("Julio Cesar Baldivieso", 85, None, True, False)),
+    ("Luis Capurro 52 own goal", ("Luis Capurro", 52, None, False, True)),
+    # adicional sin minutos
+    ("Andrei Girotto 90+", ("Andrei Girotto", 90, None, False, False)),
+    # restos de tipeo
+    ("Maicon 89}", ("Maicon", 89, None, False, False)),
+    ("Dario Conca 90+2)", ("Dario Conca", 90, 2, False, False)),
+])
+def test_token_gol(texto, esperado):
+    assert _uno(texto) == esperado
+
+
+def test_cantidad_sin_minuto():
+    goles = _goles("Rivera(2)")
+    assert [(g.jugador, g.minuto) for g in goles] == [("Rivera", None), ("Rivera", None)]
+
+
+def test_minuto_suelto_es_del_jugador_anterior():
+    goles = _goles("Juan Pablo Rodríguez 14 pen, 86 pen, Otro 90+")
+    assert [(g.jugador, g.minuto, g.penal) for g in goles] == [
+        ("Juan Pablo Rodríguez", 14, True), ("Juan Pablo Rodríguez", 86, True), ("Otro", 90, False),
+    ]
+
+
+def test_coma_faltante_entre_lineas():
+    goles = _goles("Nicolás Colazo 58, 71 Andrés Chávez 77")
+    assert [(g.jugador, g.minuto) for g in goles] == [
+        ("Nicolás Colazo", 58), ("Nicolás Colazo", 71), ("Andrés Chávez", 77),
+    ]
+
+
+def test_lados_con_punto_y_coma():
+    goles = _goles("A 1, B 2; C 3", gl=2, gv=1)
+    assert [g.lado for g in goles] == ["local", "local", "visitante"]
+
+
+def test_lados_sin_punto_y_coma():
+    assert {g.lado for g in _goles("A 1, B 2", gl=2, gv=0)} == {"local"}
+    assert {g.lado for g in _goles("A 1, B 2", gl=0, gv=2)} == {"visitante"}
+    # los dos equipos hicieron goles: no se inventa el lado
+    assert {g.lado for g in _goles("A 1, B 2, C 3", gl=2, gv=1)} == {"desconocido"}
+
+
+def test_goles_descuadrados():
+    partidos = pd.DataFrame({
+        "temporada": [2000, 2000, 2000],
+        "fecha": ["2000-01-01", "2000-01-02", "2000-01-03"],
+        "equipo_local": ["A", "A", "A"],
+        "equipo_visitante": ["B", "C", "D"],
+        "goles_local": [1, 2, 1],
+        "goles_visitante": [1, 1, 1],
+        "archivo_fuente": ["2000.txt"] * 3,
+    })
+    goles = pd.DataFrame({
+        "clave_partido": ["2000|2000-01-01|A|B"] * 2 + ["2000|2000-01-02|A|C"] * 2 + ["2000|2000-01-03|A|D"] * 2,
+        "lado": ["local", "visitante", "local", "local", "desconocido", "desconocido"],
+    })
+    descuadrados = goles_descuadrados(partidos, goles)
+    assert list(descuadrados["clave_partido"]) == ["2000|2000-01-02|A|C"]
+
+
+def _lote(temporada: int, agregado: str | None) -> pd.DataFrame:
+    partidos = ColumnasPartidos([PartidoCrudo(
+        temporada=temporada, etapa="Final", grupo=None, instancia="Ida", fecha=f"{temporada}-01-01",
+        equipo_local="A", equipo_visitante="B", goles_local=1, goles_visitante=0,
+        agregado_texto=agregado, fuente="RSSSF", archivo_fuente=f"{temporada}.txt", linea_partido="A 1-0 B",
+    )])
+    return partidos.a_dataframe()
+
+
+def test_escritor_columna_nula_en_primer_lote(tmp_path):
+    # desde 2000 agregado_texto viene todo nulo: el esquema no puede salir del primer lote
+    lotes = [_lote(2010, None), _lote(2099, "agg 2-1")]
+    ruta = tmp_path / "partidos.parquet"
+    with EscritorCapa(ruta, exportar_csv=False, esquema=ESQUEMA_CRUDO) as esc:
+        for df in lotes:
+            esc.escribir(df)
+        esc.cerrar()
+
+    leido = pd.read_parquet(ruta)
+    assert list(leido["agregado_texto"].fillna("")) == ["", "agg 2-1"]
+    # el primer lote tiene la columna en object (todo None); el leído respeta el esquema
+    assert leido.dtypes.astype(str).to_dict() == lotes[1].dtypes.astype(str).to_dict()
+
+
+def test_escritor_falla_sin_truncar(tmp_path):
+    ruta = tmp_path / "partidos.parquet"
+    with EscritorCapa(ruta, exportar_csv=True, esquema=ESQUEMA_CRUDO) as esc:
+        esc.escribir(_lote(2010, None))
+        esc.cerrar()
+    previo = (tmp_path / "partidos.csv").read_bytes()
+
+    with pytest.raises(RuntimeError):
+        with EscritorCapa(ruta, exportar_csv=True, esquema=ESQUEMA_CRUDO) as esc:
+            esc.escribir(_lote(2011, None))
+            raise RuntimeError("corte a mitad de la corrida")
+
+    # la corrida fallida no toca la capa anterior ni deja temporales
+    assert (tmp_path / "partidos.csv").read_bytes() == previo
+    assert len(pd.read_parquet(ruta)) == 1
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["partidos.csv", "partidos.parquet"]